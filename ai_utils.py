@@ -1,54 +1,86 @@
 import os
 import json
 from urllib.parse import urlparse
-from bs4 import BeautifulSoup
-from typing import Dict, List, Optional, Tuple
-import requests
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
 from openai import OpenAI
+from utils.llm_cache import LLMCache, create_backend, make_cache_key
+from utils.http_fetcher import fetch_url, iter_text
+from utils.html_extractor import extract_stream
+from archetype_scoring import ArchetypeScorer, archetype_data, normalize_percentages, rounded, subscale_scorer
 
 # Initialize OpenAI API
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 openai_client = OpenAI(api_key=OPENAI_API_KEY)
 
-# Archetype Data
-archetype_data = {
-    "Autonomous": {
-        "Focus on solving the problem": {
-            "keywords": ["efficient", "practical", "results", "growth", "achievement"],
-            "interpretation": "Consumers with high logical reasoning and organization skills.",
-            "neuromarketing_objective": "Highlight product efficiency and functionality. Provide technical data.",
-            "consumer_type": "Goal-oriented professionals, leaders, entrepreneurs."
-        },
-        "Strive and succeed": {
-            "keywords": ["growth", "success", "achievement"],
-            "interpretation": "Highly motivated, perseverant, and ambitious consumers.",
-            "neuromarketing_objective": "Emphasize achievement and personal growth with success stories.",
-            "consumer_type": "Entrepreneurs, ambitious professionals, outstanding students."
-        }
-    },
-    "Impulsive": {
-        "Tension reduction": {
-            "keywords": ["quick", "easy", "instant"],
-            "interpretation": "Consumers with low frustration tolerance, seeking immediate gratification.",
-            "neuromarketing_objective": "Offer instant satisfaction and ease of use.",
-            "consumer_type": "Impulsive buyers, tech enthusiasts, trend seekers."
-        },
-        "Self-blame": {
-            "keywords": ["change", "improve", "growth"],
-            "interpretation": "Consumers who tend to blame themselves or others.",
-            "neuromarketing_objective": "Use positive messages that boost self-esteem.",
-            "consumer_type": "People seeking change and personal development."
-        }
-    },
-    # Add additional archetypes and subscales as necessary
-}
+# Shared LLM response cache (backend selected by LLM_CACHE_BACKEND)
+llm_cache = LLMCache(create_backend())
+
+# Channel-prefixed term weights used by calculate_archetype_probabilities
+PROBABILITY_ARCHETYPES = ['Autonomous', 'Impulsive', 'Avoidant', 'Isolated']
+probability_scorer = ArchetypeScorer({
+    'brand:efficiency': {'Autonomous': 10},
+    'brand:growth': {'Autonomous': 10},
+    'brand:creativity': {'Impulsive': 10},
+    'brand:comfort': {'Impulsive': 10},
+    'brand:security': {'Avoidant': 10},
+    'brand:authenticity': {'Avoidant': 10},
+    'brand:mastery': {'Isolated': 10},
+    'brand:balance': {'Isolated': 10},
+    'icp:Technology': {'Autonomous': 5},
+    'icp:Healthcare': {'Autonomous': 5},
+    'icp:Retail': {'Impulsive': 5},
+    'icp:Social Media': {'Impulsive': 5},
+    'icp_text:growth': {'Autonomous': 10},
+    'seo:efficiency': {'Autonomous': 5},
+    'seo:trust': {'Autonomous': 5},
+    'seo:creativity': {'Impulsive': 5},
+    'seo:relaxation': {'Impulsive': 5}
+}, PROBABILITY_ARCHETYPES)
 
 # Function Definitions
 def validate_inputs(story: str, content_type: str) -> bool:
     """Validate input parameters before generating content."""
     return bool(story and story.strip() and content_type and content_type.strip())
 
-def generate_marketing_content(prompt: str, content_type: str) -> Dict:
+def create_chat_completion(messages: List[Dict], model: str = "gpt-4",
+                           temperature: Optional[float] = None,
+                           max_tokens: Optional[int] = None,
+                           use_cache: bool = True,
+                           parse: Optional[Callable[[str], Any]] = None) -> Any:
+    """
+    Run a chat completion through the response cache and return the message text.
+
+    With ``parse``, the text is returned parsed, and only replies that parse
+    are cached; a cached reply that no longer parses is dropped and requested again.
+    """
+    key = make_cache_key(model, messages, temperature, max_tokens)
+    if use_cache:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            if parse is None:
+                return cached
+            try:
+                return parse(cached)
+            except Exception:
+                llm_cache.delete(key)
+
+    params = {"model": model, "messages": messages}
+    if temperature is not None:
+        params["temperature"] = temperature
+    if max_tokens is not None:
+        params["max_tokens"] = max_tokens
+
+    response = openai_client.chat.completions.create(**params)
+    generated_text = response.choices[0].message.content
+    result = generated_text if parse is None else parse(generated_text)
+
+    if use_cache:
+        llm_cache.set(key, generated_text)
+    return result
+
+def generate_marketing_content(prompt: str, content_type: str, use_cache: bool = True) -> Dict:
     """Generate marketing content using OpenAI's API."""
     try:
         system_message = """You are an expert marketing content generator. 
@@ -62,18 +94,17 @@ def generate_marketing_content(prompt: str, content_type: str) -> Dict:
 
         Make sure each section is clearly separated by newlines and properly labeled."""
 
-        response = openai_client.chat.completions.create(
+        generated_text = create_chat_completion(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": prompt}
             ],
             temperature=0.7,
-            max_tokens=2000
+            max_tokens=2000,
+            use_cache=use_cache
         )
 
-        generated_text = response.choices[0].message.content
-
         content_dict = {
             "title": "",
             "content": "",
@@ -127,7 +158,7 @@ def generate_marketing_content(prompt: str, content_type: str) -> Dict:
             "tone": content_type
         }
 
-def analyze_audience(data: dict) -> dict:
+def analyze_audience(data: dict, use_cache: bool = True) -> dict:
     """Analyze audience data and provide insights."""
     prompt = f'''
     Analyze audience data and provide insights:
@@ -148,11 +179,25 @@ def analyze_audience(data: dict) -> dict:
     }}
     '''
 
-    response = openai_client.chat.completions.create(
+    return create_chat_completion(
         model="gpt-4",
-        messages=[{"role": "user", "content": prompt}]
+        messages=[{"role": "user", "content": prompt}],
+        use_cache=use_cache,
+        parse=json.loads
     )
-    return json.loads(response.choices[0].message.content)
+
+def probability_terms(brand_values: dict, icp_data: dict, seo_analysis: dict) -> List[str]:
+    """Flatten one brand values / ICP / SEO triple into channel-prefixed scoring terms."""
+    terms = [f"brand:{keyword}" for keyword in brand_values.get('keywords', [])]
+
+    for question, answer in icp_data.get('answers', {}).items():
+        if isinstance(answer, list):
+            terms.extend(f"icp:{value}" for value in answer)
+        elif isinstance(answer, str) and "growth" in answer:
+            terms.append("icp_text:growth")
+
+    terms.extend(f"seo:{keyword.lower()}" for keyword in seo_analysis.get('keyword_suggestions', []))
+    return terms
 
 def calculate_archetype_probabilities(brand_values: dict, icp_data: dict, seo_analysis: dict) -> dict:
     """
@@ -160,46 +205,61 @@ def calculate_archetype_probabilities(brand_values: dict, icp_data: dict, seo_an
     Combines Brand Values, ICP data, and SEO analysis.
     """
     try:
-        archetypes = ['Autonomous', 'Impulsive', 'Avoidant', 'Isolated']
-        scores = {archetype: 0 for archetype in archetypes}
-
-        # Factor in brand values
-        for keyword in brand_values.get('keywords', []):
-            if keyword in ['efficiency', 'growth']:
-                scores['Autonomous'] += 10
-            elif keyword in ['creativity', 'comfort']:
-                scores['Impulsive'] += 10
-            elif keyword in ['security', 'authenticity']:
-                scores['Avoidant'] += 10
-            elif keyword in ['mastery', 'balance']:
-                scores['Isolated'] += 10
-
-        # Factor in ICP answers
-        for question, answer in icp_data.get('answers', {}).items():
-            if isinstance(answer, list):
-                for value in answer:
-                    if value in ['Technology', 'Healthcare']:
-                        scores['Autonomous'] += 5
-                    elif value in ['Retail', 'Social Media']:
-                        scores['Impulsive'] += 5
-            elif isinstance(answer, str) and "growth" in answer:
-                scores['Autonomous'] += 10
-
-        # Factor in SEO analysis
-        for keyword in seo_analysis.get('keyword_suggestions', []):
-            if keyword.lower() in ['efficiency', 'trust']:
-                scores['Autonomous'] += 5
-            elif keyword.lower() in ['creativity', 'relaxation']:
-                scores['Impulsive'] += 5
-
-        total = sum(scores.values())
-        probabilities = {k: round(v / total * 100, 2) if total > 0 else 0 for k, v in scores.items()}
-
-        return probabilities
+        counts = probability_scorer.count_terms([probability_terms(brand_values, icp_data, seo_analysis)])
+        probabilities = normalize_percentages(probability_scorer.score(counts))
+        return rounded(probability_scorer.to_dicts(probabilities)[0])
 
     except Exception as e:
         return {"error": f"Error calculating archetype probabilities: {str(e)}"}
 
+def _probability_inputs(inputs) -> Tuple[List, pd.Index]:
+    """Normalize a DataFrame or list of triples/dicts into (brand_values, icp_data, seo_analysis) rows."""
+    columns = ('brand_values', 'icp_data', 'seo_analysis')
+    if isinstance(inputs, pd.DataFrame):
+        frame = inputs.reindex(columns=list(columns))
+        rows = [
+            tuple({} if isinstance(value, float) and np.isnan(value) else value for value in row)
+            for row in frame.itertuples(index=False, name=None)
+        ]
+        return rows, inputs.index
+
+    rows = []
+    for item in inputs:
+        if isinstance(item, dict):
+            rows.append(tuple(item.get(column, {}) for column in columns))
+        else:
+            rows.append(item)
+    return rows, pd.RangeIndex(len(rows))
+
+def calculate_archetype_probabilities_batch(inputs) -> pd.DataFrame:
+    """
+    Calculate archetype probabilities for many brand values / ICP / SEO triples at once.
+
+    Accepts a DataFrame with brand_values, icp_data and seo_analysis columns, or a
+    list of triples or dicts with those keys. Returns a DataFrame with one column
+    per archetype plus an ``error`` column; rows that fail get NaN probabilities
+    and their error message instead of aborting the batch.
+    """
+    rows, index = _probability_inputs(inputs)
+    documents, errors = [], []
+    for row in rows:
+        try:
+            brand_values, icp_data, seo_analysis = row
+            documents.append(probability_terms(brand_values, icp_data, seo_analysis))
+            errors.append(None)
+        except Exception as e:
+            documents.append([])
+            errors.append(f"Error calculating archetype probabilities: {str(e)}")
+
+    counts = probability_scorer.count_terms(documents)
+    probabilities = np.round(normalize_percentages(probability_scorer.score(counts)), 2)
+
+    frame = pd.DataFrame(probabilities, columns=PROBABILITY_ARCHETYPES, index=index)
+    failed = np.array([error is not None for error in errors], dtype=bool)
+    frame.loc[failed, PROBABILITY_ARCHETYPES] = np.nan
+    frame['error'] = errors
+    return frame
+
 def generate_archetype_recommendations(probabilities: dict) -> dict:
     """
     Generate recommendations for keywords and marketing campaigns based on archetype probabilities.
@@ -244,29 +304,21 @@ def generate_archetype_recommendations(probabilities: dict) -> dict:
 def analyze_webpage(url: str) -> dict:
     """Analyze webpage content and extract relevant information."""
     try:
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-
-        soup = BeautifulSoup(response.text, 'html.parser')
-        title = soup.title.string if soup.title else ""
-        meta_description = ""
-        meta_keywords = ""
-        for meta in soup.find_all('meta'):
-            if meta.get('name', '').lower() == 'description':
-                meta_description = meta.get('content', '')
-            elif meta.get('name', '').lower() == 'keywords':
-                meta_keywords = meta.get('content', '')
-
-        content = ' '.join(soup.stripped_strings)
+        response = fetch_url(url, timeout=10, stream=True)
+        chunks = iter_text(response)
+        try:
+            # Headings aren't used here, so the download stops once the text budget is read
+            page = extract_stream(chunks, max_text_chars=1000, headings=False)
+        finally:
+            chunks.close()
 
         return {
             "url": url,
             "domain": urlparse(url).netloc,
-            "title": title,
-            "meta_description": meta_description,
-            "meta_keywords": meta_keywords,
-            "content": content[:1000]
+            "title": page["title"],
+            "meta_description": page["meta_description"],
+            "meta_keywords": page["meta_keywords"],
+            "content": page["visible_text"]
         }
 
     except Exception as e:
@@ -282,22 +334,26 @@ def match_archetypes_and_subscales(brand_values: Dict, icp_data: Dict, seo_data:
     }
     subscale_matches = []
 
-    # Match keywords to archetypes and subscales
-    for archetype, subscales in archetype_data.items():
-        for subscale, data in subscales.items():
-            matched_keywords = [
-                kw for kw in brand_values.get('keywords', []) if kw in data['keywords']
-            ]
-            if matched_keywords:
-                archetype_scores[archetype] += len(matched_keywords)
-                subscale_matches.append({
-                    'archetype': archetype,
-                    'subscale': subscale,
-                    'interpretation': data['interpretation'],
-                    'neuromarketing_objective': data['neuromarketing_objective'],
-                    'consumer_type': data['consumer_type'],
-                    'matched_keywords': matched_keywords,
-                    'missing_keywords': list(set(data['keywords']) - set(matched_keywords))
-                })
+    # Score brand keywords against every subscale in one matrix product
+    scorer = subscale_scorer()
+    brand_keywords = brand_values.get('keywords', [])
+    subscale_scores = scorer.score(scorer.count_terms([brand_keywords]))
+    for archetype, score in zip(scorer.groups, scorer.rollup(subscale_scores)[0]):
+        archetype_scores[archetype] += int(score)
+
+    for (archetype, subscale), score in zip(scorer.labels, subscale_scores[0]):
+        if not score:
+            continue
+        data = archetype_data[archetype][subscale]
+        matched_keywords = [kw for kw in brand_keywords if kw in data['keywords']]
+        subscale_matches.append({
+            'archetype': archetype,
+            'subscale': subscale,
+            'interpretation': data['interpretation'],
+            'neuromarketing_objective': data['neuromarketing_objective'],
+            'consumer_type': data['consumer_type'],
+            'matched_keywords': matched_keywords,
+            'missing_keywords': list(set(data['keywords']) - set(matched_keywords))
+        })
 
     return archetype_scores, subscale_matches
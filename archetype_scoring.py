@@ -0,0 +1,163 @@
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from scipy import sparse
+from utils.keyword_matcher import compile_matcher
+
+# Archetype/subscale keyword table shared by ai_utils and the alignment component
+archetype_data = {
+    "Autonomous": {
+        "Focus on solving the problem": {
+            "keywords": ["efficient", "practical", "results", "growth", "achievement"],
+            "interpretation": "Consumers with high logical reasoning and organization skills.",
+            "neuromarketing_objective": "Highlight product efficiency and functionality. Provide technical data.",
+            "consumer_type": "Goal-oriented professionals, leaders, entrepreneurs."
+        },
+        "Strive and succeed": {
+            "keywords": ["growth", "success", "achievement"],
+            "interpretation": "Highly motivated, perseverant, and ambitious consumers.",
+            "neuromarketing_objective": "Emphasize achievement and personal growth with success stories.",
+            "consumer_type": "Entrepreneurs, ambitious professionals, outstanding students."
+        }
+    },
+    "Impulsive": {
+        "Tension reduction": {
+            "keywords": ["quick", "easy", "instant"],
+            "interpretation": "Consumers with low frustration tolerance, seeking immediate gratification.",
+            "neuromarketing_objective": "Offer instant satisfaction and ease of use.",
+            "consumer_type": "Impulsive buyers, tech enthusiasts, trend seekers."
+        },
+        "Self-blame": {
+            "keywords": ["change", "improve", "growth"],
+            "interpretation": "Consumers who tend to blame themselves or others.",
+            "neuromarketing_objective": "Use positive messages that boost self-esteem.",
+            "consumer_type": "People seeking change and personal development."
+        }
+    },
+    # Add additional archetypes and subscales as necessary
+}
+
+
+class ArchetypeScorer:
+    """
+    Sparse term -> label weight matrix.
+
+    Documents are turned into a (documents x terms) count matrix and scored
+    with a single matrix product, so one call can score many brands or pages.
+    Labels are archetypes or (archetype, subscale) pairs; ``groups`` optionally
+    rolls labels up into archetype totals.
+    """
+
+    def __init__(self, term_weights: Dict[str, Dict[Hashable, float]], labels: Sequence[Hashable],
+                 groups: Optional[Dict[Hashable, Hashable]] = None):
+        self.labels = tuple(labels)
+        self.terms = tuple(term_weights)
+        self.term_index = {term: index for index, term in enumerate(self.terms)}
+        label_index = {label: index for index, label in enumerate(self.labels)}
+
+        rows, cols, values = [], [], []
+        for term, weights in term_weights.items():
+            for label, weight in weights.items():
+                rows.append(self.term_index[term])
+                cols.append(label_index[label])
+                values.append(weight)
+        self.weights = sparse.csr_matrix(
+            (values, (rows, cols)), shape=(len(self.terms), len(self.labels)), dtype=float
+        )
+
+        self.groups: Tuple[Hashable, ...] = ()
+        self.group_matrix = None
+        if groups:
+            self.groups = tuple(dict.fromkeys(groups[label] for label in self.labels))
+            group_index = {group: index for index, group in enumerate(self.groups)}
+            self.group_matrix = sparse.csr_matrix(
+                (
+                    np.ones(len(self.labels)),
+                    (np.arange(len(self.labels)), [group_index[groups[label]] for label in self.labels])
+                ),
+                shape=(len(self.labels), len(self.groups))
+            )
+
+    @classmethod
+    def from_keyword_map(cls, keyword_map: Dict[str, str], labels: Sequence[str],
+                         weight: float = 1.0) -> "ArchetypeScorer":
+        """Build a scorer where each keyword points at exactly one archetype."""
+        return cls({term: {label: weight} for term, label in keyword_map.items()}, labels)
+
+    @classmethod
+    def from_keyword_lists(cls, keyword_lists: Dict[str, List[str]],
+                           normalize: bool = False) -> "ArchetypeScorer":
+        """Build a scorer from archetype -> keyword lists, optionally weighting by 1/len(list)."""
+        term_weights: Dict[str, Dict[Hashable, float]] = {}
+        for label, keywords in keyword_lists.items():
+            weight = 1.0 / len(keywords) if normalize and keywords else 1.0
+            for keyword in keywords:
+                term_weights.setdefault(keyword, {})[label] = weight
+        return cls(term_weights, list(keyword_lists))
+
+    @classmethod
+    def from_subscales(cls, subscale_data: Dict[str, Dict[str, Dict]]) -> "ArchetypeScorer":
+        """Build a scorer with one label per (archetype, subscale), grouped by archetype."""
+        term_weights: Dict[str, Dict[Hashable, float]] = {}
+        labels, groups = [], {}
+        for archetype, subscales in subscale_data.items():
+            for subscale, data in subscales.items():
+                label = (archetype, subscale)
+                labels.append(label)
+                groups[label] = archetype
+                for keyword in data["keywords"]:
+                    term_weights.setdefault(keyword, {})[label] = 1.0
+        return cls(term_weights, labels, groups)
+
+    def count_terms(self, documents: Sequence[Iterable[str]]) -> sparse.csr_matrix:
+        """Count known terms in pre-tokenized documents (documents x terms)."""
+        rows, cols = [], []
+        for row, document in enumerate(documents):
+            for term in document:
+                index = self.term_index.get(term)
+                if index is not None:
+                    rows.append(row)
+                    cols.append(index)
+        return sparse.csr_matrix(
+            (np.ones(len(rows)), (rows, cols)), shape=(len(documents), len(self.terms))
+        )
+
+    def count_texts(self, texts: Sequence[str], boundary: Optional[str] = "word",
+                    ignore_case: bool = False) -> sparse.csr_matrix:
+        """Count term occurrences in raw texts with the shared compiled matcher."""
+        matcher = compile_matcher(self.terms, boundary=boundary, ignore_case=ignore_case)
+        return self.count_terms([matcher.findall(text) for text in texts])
+
+    def score(self, counts) -> np.ndarray:
+        """Score a (documents x terms) count matrix into (documents x labels)."""
+        return np.asarray((sparse.csr_matrix(counts) @ self.weights).todense())
+
+    def rollup(self, scores: np.ndarray) -> np.ndarray:
+        """Sum label scores into their groups (documents x groups)."""
+        if self.group_matrix is None:
+            return scores
+        return np.asarray(scores @ self.group_matrix.toarray())
+
+    def to_dicts(self, scores: np.ndarray, labels: Optional[Sequence[Hashable]] = None) -> List[Dict]:
+        labels = labels or self.labels
+        return [dict(zip(labels, row.tolist())) for row in np.asarray(scores)]
+
+
+def normalize_percentages(scores: np.ndarray) -> np.ndarray:
+    """Row-wise share of each score in percent; rows that sum to zero stay zero."""
+    scores = np.asarray(scores, dtype=float)
+    totals = scores.sum(axis=1, keepdims=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        percentages = np.where(totals > 0, scores / totals * 100, 0.0)
+    return percentages
+
+
+def rounded(values: Dict, digits: int = 2) -> Dict:
+    """Round a label -> score dict the way the per-item scoring functions always have."""
+    return {label: round(float(value), digits) for label, value in values.items()}
+
+
+@lru_cache(maxsize=None)
+def subscale_scorer() -> ArchetypeScorer:
+    """Scorer over the shared archetype/subscale keyword table."""
+    return ArchetypeScorer.from_subscales(archetype_data)
@@ -1,39 +1,114 @@
 import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional 
 import streamlit as st
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 import secrets
-import psycopg2
 from psycopg2.extras import RealDictCursor
+from database import get_pool
+from utils.ttl_cache import TTLCache
 from utils.session_manager import clear_user_session, initialize_user_session
 
 # Password hashing configuration
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))
+PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", 32))
+PASSWORD_HASH_TIMEOUT = float(os.environ.get("PASSWORD_HASH_TIMEOUT", 10))
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised when too many password operations are already waiting."""
+
+
+class PasswordHasher:
+    """
+    Bounded worker pool for bcrypt.
+
+    At most ``workers`` hashes run at once, however many sessions log in, so a
+    login burst queues here instead of taking every CPU from the rest of the
+    app. At most ``max_pending`` further operations may wait; beyond that (or
+    after ``timeout`` seconds waiting for a slot) callers get PasswordHasherBusy.
+    """
+
+    def __init__(self, context: CryptContext = pwd_context, workers: int = PASSWORD_HASH_WORKERS,
+                 max_pending: int = PASSWORD_HASH_MAX_PENDING, timeout: float = PASSWORD_HASH_TIMEOUT):
+        self.context = context
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._lock = threading.Lock()
+        self._stats = {"queued": 0, "active": 0, "completed": 0, "rejected": 0,
+                       "max_queue_depth": 0, "total_wait": 0.0}
+
+    def hash(self, password: str) -> str:
+        return self._run(self.context.hash, password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        return self._run(self.context.verify, password, hashed)
+
+    def stats(self) -> Dict:
+        """Queue depth, in-flight and completed counts, and the mean time spent queued."""
+        with self._lock:
+            stats = dict(self._stats)
+        total_wait = stats.pop("total_wait")
+        stats["avg_wait_seconds"] = total_wait / stats["completed"] if stats["completed"] else 0.0
+        return stats
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(timeout=self.timeout):
+            self._update(rejected=1)
+            raise PasswordHasherBusy("Too many sign-in requests, please try again shortly")
+        submitted = time.monotonic()
+        self._update(queued=1)
+        try:
+            return self._executor.submit(self._call, submitted, fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def _call(self, submitted: float, fn, *args):
+        self._update(queued=-1, active=1, total_wait=time.monotonic() - submitted)
+        try:
+            return fn(*args)
+        finally:
+            self._update(active=-1, completed=1)
+
+    def _update(self, **deltas):
+        with self._lock:
+            for key, delta in deltas.items():
+                self._stats[key] += delta
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], self._stats["queued"])
+
+
+password_hasher = PasswordHasher()
 
 # JWT Configuration
 SECRET_KEY = os.environ.get("SECRET_KEY", secrets.token_urlsafe(32))
 ALGORITHM = "HS256"
-ACCESS_TOKEN_EXPIRE_MINUTES = 30
+ACCESS_TOKEN_EXPIRE_MINUTES = int(os.environ.get("ACCESS_TOKEN_EXPIRE_MINUTES", 30))
+# Active sessions get a fresh token once the current one is this close to expiring
+ACCESS_TOKEN_RENEW_MINUTES = int(os.environ.get("ACCESS_TOKEN_RENEW_MINUTES", 10))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get("TOKEN_CACHE_MAX_ENTRIES", 1024))
+
+# Decoded claims of recently verified tokens, each kept only until the token expires
+token_cache = TTLCache(max_entries=TOKEN_CACHE_MAX_ENTRIES)
 
 def get_db_connection():
-    """Get database connection using environment variables"""
-    return psycopg2.connect(
-        dbname=os.environ["PGDATABASE"],
-        user=os.environ["PGUSER"],
-        password=os.environ["PGPASSWORD"],
-        host=os.environ["PGHOST"],
-        port=os.environ["PGPORT"]
-    )
+    """Check out a pooled database connection; use as a context manager so it is returned"""
+    return get_pool().connection()
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify a password against its hash on the bounded bcrypt pool"""
+    return password_hasher.verify(plain_password, hashed_password)
 
 def get_password_hash(password: str) -> str:
-    """Generate password hash"""
-    return pwd_context.hash(password)
+    """Generate password hash on the bounded bcrypt pool"""
+    return password_hasher.hash(password)
 
 def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
@@ -46,10 +121,51 @@ def create_access_token(data: Dict, expires_delta: Optional[timedelta] = None) -
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def verify_token(token: str) -> Optional[Dict]:
+    """Return the claims of a valid, unexpired access token, or None"""
+    if not token:
+        return None
+    claims = token_cache.get(token)
+    if claims is not None:
+        return claims
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return None
+    ttl = claims.get("exp", 0) - time.time()
+    if ttl > 0:
+        token_cache.set(token, claims, ttl)
+    return claims
+
+def renew_access_token(token: str, claims: Dict) -> str:
+    """Reissue a verified token that is about to expire (sliding expiry), or return it unchanged"""
+    if claims.get("exp", 0) - time.time() > ACCESS_TOKEN_RENEW_MINUTES * 60:
+        return token
+    token_cache.delete(token)
+    return create_access_token(
+        data={"sub": claims["sub"], "uid": claims["uid"]},
+        expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+
+def restore_session(token: str) -> bool:
+    """Re-establish the session identity from an access token, e.g. on another replica"""
+    claims = verify_token(token)
+    if not claims or "uid" not in claims:
+        return False
+    token = renew_access_token(token, claims)
+    if st.session_state.get("user_id") != claims["uid"]:
+        st.session_state.user_id = claims["uid"]
+        st.session_state.user_email = claims["sub"]
+        initialize_user_session(str(claims["uid"]))
+    st.session_state.access_token = token
+    return True
+
 def register_user(email: str, password: str, name: str, surname: str, 
                  cellphone: str, purpose: str) -> Dict:
     """Register a new user"""
     try:
+        # Hash before checking out a connection so bcrypt never holds one
+        password_hash = get_password_hash(password)
         with get_db_connection() as conn:
             with conn.cursor(cursor_factory=RealDictCursor) as cur:
                 # Check if user exists
@@ -63,14 +179,14 @@ def register_user(email: str, password: str, name: str, surname: str,
                                      cellphone, purpose)
                     VALUES (%s, %s, %s, %s, %s, %s)
                     RETURNING id, email
-                """, (email, get_password_hash(password), name, surname, 
+                """, (email, password_hash, name, surname, 
                       cellphone, purpose))
                 user = cur.fetchone()
                 conn.commit()
                 
                 # Create access token
                 access_token = create_access_token(
-                    data={"sub": user["email"]},
+                    data={"sub": user["email"], "uid": user["id"]},
                     expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
                 )
 
@@ -99,19 +215,22 @@ def authenticate_user(email: str, password: str) -> Dict:
                 """, (email,))
                 user = cur.fetchone()
                 
-                if not user:
-                    return {"error": "Invalid credentials"}
-                
-                if not verify_password(password, user["password_hash"]):
-                    return {"error": "Invalid credentials"}
-                
-                # Create access token
-                access_token = create_access_token(
-                    data={"sub": user["email"]},
-                    expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-                )
-                
-                # Update last login
+        if not user:
+            return {"error": "Invalid credentials"}
+        
+        # Verify outside the connection block so bcrypt never holds a pooled connection
+        if not verify_password(password, user["password_hash"]):
+            return {"error": "Invalid credentials"}
+        
+        # Create access token
+        access_token = create_access_token(
+            data={"sub": user["email"], "uid": user["id"]},
+            expires_delta=timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+        )
+        
+        # Update last login
+        with get_db_connection() as conn:
+            with conn.cursor() as cur:
                 cur.execute("""
                     UPDATE users 
                     SET last_login = CURRENT_TIMESTAMP 
@@ -119,15 +238,15 @@ def authenticate_user(email: str, password: str) -> Dict:
                 """, (user["id"],))
                 conn.commit()
 
-                # Initialize user session state
-                initialize_user_session(str(user["id"]))
-                
-                return {
-                    "access_token": access_token,
-                    "token_type": "bearer",
-                    "user_id": user["id"],
-                    "email": user["email"]
-                }
+        # Initialize user session state
+        initialize_user_session(str(user["id"]))
+        
+        return {
+            "access_token": access_token,
+            "token_type": "bearer",
+            "user_id": user["id"],
+            "email": user["email"]
+        }
                 
     except Exception as e:
         return {"error": str(e)}
@@ -140,8 +259,13 @@ def logout_user():
         del st.session_state.user_id
         del st.session_state.user_email
         if "access_token" in st.session_state:
+            token_cache.delete(st.session_state.access_token)
             del st.session_state.access_token
 
 def is_authenticated() -> bool:
-    """Check if user is authenticated in current session"""
-    return bool(st.session_state.get("user_id"))
+    """Check the session's access token on every rerun; expired or invalid tokens log the user out"""
+    if restore_session(st.session_state.get("access_token")):
+        return True
+    if st.session_state.get("user_id"):
+        logout_user()
+    return False
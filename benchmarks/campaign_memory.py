@@ -0,0 +1,68 @@
+"""
+Memory footprint of campaign content pieces and emotional profiles.
+
+Builds a campaign for 2,000 personas x 5 content types and reports, with
+tracemalloc, the bytes allocated per content piece and per emotional
+profile (from per-call and from batch analysis).
+
+Usage (from the repository root):
+    python benchmarks/campaign_memory.py [--personas N]
+"""
+import os
+import sys
+import asyncio
+import logging
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from marketing_campaign_system import BuyerPersona, MarketingCampaignSystem
+
+ARCHETYPES = ['autonomous', 'impulsive', 'isolative', 'avoidant']
+CONTENT_TYPES = ["Blog Post", "Email", "Social Media Post", "Landing Page", "Ad"]
+BRAND_VALUES = {"keywords": ["growth", "trust"], "mission": "we build trust"}
+
+
+def measure(build):
+    """Return (result, bytes still allocated by building it)."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--personas", type=int, default=2000)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    personas = [
+        BuyerPersona(f"persona {i}", {"age": "25-34"}, ["growth"], ["time"], ["email"], ARCHETYPES[i % 4])
+        for i in range(args.personas)
+    ]
+    system = MarketingCampaignSystem()
+    campaign = asyncio.run(system.create_campaign("benchmark", [], personas, BRAND_VALUES))
+
+    pieces, size = measure(lambda: asyncio.run(system.generate_campaign_content(campaign, CONTENT_TYPES)))
+    print(f"content pieces:       {len(pieces)}, {size / 1024 / 1024:.2f} MiB, {size / len(pieces):.0f} B each")
+
+    engine = system.emotion_engine
+    count = args.personas * len(CONTENT_TYPES)
+    profiles, size = measure(lambda: [
+        engine.analyze_emotional_context(ARCHETYPES[i % 4], BRAND_VALUES, {"engagement_rate": (i % 97) / 50})
+        for i in range(count)
+    ])
+    print(f"per-call profiles:    {len(profiles)}, {size / len(profiles):.0f} B each")
+
+    profiles, size = measure(lambda: engine.analyze_emotional_context_batch(
+        [ARCHETYPES[i % 4] for i in range(count)], BRAND_VALUES
+    ))
+    print(f"batch profiles:       {len(profiles)}, {size / len(profiles):.0f} B each")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,51 +1,28 @@
 from typing import Dict, List, Tuple
 import streamlit as st
+from utils.keyword_matcher import compile_matcher
+from archetype_scoring import archetype_data, subscale_scorer
 
-archetype_data = {
-    "Autonomous": {
-        "Focus on solving the problem": {
-            "keywords": ["efficient", "practical", "results", "growth", "achievement"],
-            "interpretation": "Consumers with high logical reasoning and organization skills.",
-            "neuromarketing_objective": "Highlight product efficiency and functionality. Provide technical data.",
-            "consumer_type": "Goal-oriented professionals, leaders, entrepreneurs."
-        },
-        "Strive and succeed": {
-            "keywords": ["growth", "success", "achievement"],
-            "interpretation": "Highly motivated, perseverant, and ambitious consumers.",
-            "neuromarketing_objective": "Emphasize achievement and personal growth with success stories.",
-            "consumer_type": "Entrepreneurs, ambitious professionals, outstanding students."
-        }
-    },
-    "Impulsive": {
-        "Tension reduction": {
-            "keywords": ["quick", "easy", "instant"],
-            "interpretation": "Consumers with low frustration tolerance, seeking immediate gratification.",
-            "neuromarketing_objective": "Offer instant satisfaction and ease of use.",
-            "consumer_type": "Impulsive buyers, tech enthusiasts, trend seekers."
-        },
-        "Self-blame": {
-            "keywords": ["change", "improve", "growth"],
-            "interpretation": "Consumers who tend to blame themselves or others.",
-            "neuromarketing_objective": "Use positive messages that boost self-esteem.",
-            "consumer_type": "People seeking change and personal development."
-        }
-    },
-    # Add additional archetypes and subscales as necessary
-}
+# One case-insensitive token matcher over every subscale keyword
+alignment_matcher = compile_matcher(subscale_scorer().terms, boundary="token", ignore_case=True)
 
 def calculate_alignment(brand_values, icp_data, seo_data):
     """Align extracted data with archetypes and subscales."""
+    scorer = subscale_scorer()
+    content = seo_data.get('content', "")
+    hits = list(alignment_matcher.finditer(content))
+
+    subscale_scores = scorer.score(scorer.count_terms([[keyword for keyword, _, _ in hits]]))
     scores = {archetype: 0 for archetype in archetype_data.keys()}
-    matches = []
+    for archetype, score in zip(scorer.groups, scorer.rollup(subscale_scores)[0]):
+        scores[archetype] += int(score)
 
-    for archetype, subscales in archetype_data.items():
-        for subscale, data in subscales.items():
-            matched_keywords = [
-                kw for kw in seo_data.get('content', "").split() if kw.lower() in data["keywords"]
-            ]
-            if matched_keywords:
-                scores[archetype] += len(matched_keywords)
-                matches.append({"archetype": archetype, "subscale": subscale, "keywords": matched_keywords})
+    matches = []
+    for (archetype, subscale), score in zip(scorer.labels, subscale_scores[0]):
+        if score:
+            keywords = archetype_data[archetype][subscale]["keywords"]
+            matched_keywords = [content[start:end] for keyword, start, end in hits if keyword in keywords]
+            matches.append({"archetype": archetype, "subscale": subscale, "keywords": matched_keywords})
 
     return scores, matches
 
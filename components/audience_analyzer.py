@@ -1,6 +1,7 @@
 import streamlit as st
 import plotly.express as px
-from ai_utils import analyze_audience, map_audience_to_archetypes
+from ai_utils import analyze_audience
+from database import db, get_writer
 
 
 def render_audience_analyzer():
@@ -12,11 +13,33 @@ def render_audience_analyzer():
     # User input for business information
     business_info = st.text_area("Tell us about your business and current audience")
 
+    refresh = st.checkbox(
+        "Refresh analysis",
+        help="Run a new analysis even if this business description was analyzed before"
+    )
+
     # Button to analyze audience
     if st.button("Analyze Audience") and business_info:
         with st.spinner("Analyzing audience..."):
-            # Get analysis results
-            analysis = analyze_audience(business_info)
+            # Reuse the stored analysis unless the description changed or a refresh was asked for
+            stored = None
+            if not refresh:
+                try:
+                    stored = db.get_audience_analysis(business_info)
+                except Exception as e:
+                    st.warning(f"Could not load saved analysis: {str(e)}")
+
+            if stored:
+                analysis = stored['analysis']
+                st.caption(f"Showing saved analysis from {stored['created_at']:%Y-%m-%d %H:%M}")
+            else:
+                analysis = analyze_audience(business_info, use_cache=not refresh)
+                record = {"description": business_info, "analysis": analysis}
+                if not get_writer().submit("audience_analysis", record, block=False):
+                    try:
+                        db.save_audience_analyses_bulk([record])
+                    except Exception as e:
+                        st.warning(f"Could not save analysis to database: {str(e)}")
 
             # Display demographics
             st.markdown("### Demographics")
@@ -1,11 +1,11 @@
 import streamlit as st
 import plotly.express as px
-from emotion_engine import EmotionEngine
+from emotion_engine import get_emotion_engine
 from utils.session_manager import get_user_state, set_user_state
 from typing import Dict, List, Optional 
 
-# Initialize EmotionEngine
-emotion_engine = EmotionEngine()
+# Shared process-wide EmotionEngine
+emotion_engine = get_emotion_engine()
 
 # Get brand values from user input
 def get_brand_values() -> dict:
@@ -1,6 +1,98 @@
+import os
 import streamlit as st
+from typing import Callable, Dict, List, Optional
+from database import db
 from utils.session_manager import get_user_state, get_current_user_id, set_user_state
 
+# Most recent messages kept in session state; older ones are paged in from the database
+CHAT_HISTORY_LIMIT = int(os.environ.get("CHAT_HISTORY_LIMIT", 50))
+
+
+def _as_message(row: Dict) -> Dict:
+    return {"id": row["id"], "role": row["role"], "content": row["content"]}
+
+
+def _older_key(user_id: str) -> str:
+    return f"chat_older_{user_id}"
+
+
+def _older_page(user_id: str, chat_id: Optional[int]) -> Optional[Dict]:
+    """Messages paged in before the session window; kept in this browser session only, never persisted."""
+    older = st.session_state.get(_older_key(user_id))
+    if chat_id is None or not older or older["chat_id"] != chat_id:
+        return None
+    return older
+
+
+def append_chat_message(user_id: str, role: str, content: str) -> Dict:
+    """Store a message in the current conversation (creating it if needed) and in the capped session window."""
+    chat_id = get_user_state(user_id, "current_chat_id")
+    message_id = None
+    try:
+        if chat_id is None:
+            chat_id = db.create_conversation(user_id, title=content[:80])
+            set_user_state(user_id, "current_chat_id", chat_id)
+        message_id = db.save_chat_message(chat_id, role, content)
+    except Exception as e:
+        st.warning(f"Could not save message: {str(e)}")
+
+    message = {"id": message_id, "role": role, "content": content}
+    chat_history = get_user_state(user_id, "chat_history", []) + [message]
+    if len(chat_history) > CHAT_HISTORY_LIMIT:
+        trimmed = chat_history[:-CHAT_HISTORY_LIMIT]
+        chat_history = chat_history[-CHAT_HISTORY_LIMIT:]
+        older = _older_page(user_id, chat_id)
+        if older is not None:
+            older["messages"].extend(trimmed)
+        set_user_state(user_id, "chat_has_older", True)
+    set_user_state(user_id, "chat_history", chat_history)
+    return message
+
+
+def open_conversation(user_id: str, chat_id: int):
+    """Make a stored conversation current, loading only its most recent messages."""
+    page = db.get_chat_messages(chat_id, limit=CHAT_HISTORY_LIMIT + 1)
+    st.session_state.pop(_older_key(user_id), None)
+    set_user_state(user_id, "current_chat_id", chat_id)
+    set_user_state(user_id, "chat_has_older", len(page) > CHAT_HISTORY_LIMIT)
+    set_user_state(user_id, "chat_history", [_as_message(row) for row in page[-CHAT_HISTORY_LIMIT:]])
+
+
+def has_older_messages(user_id: str) -> bool:
+    older = _older_page(user_id, get_user_state(user_id, "current_chat_id"))
+    return older["has_more"] if older is not None else get_user_state(user_id, "chat_has_older", False)
+
+
+def visible_messages(user_id: str) -> List[Dict]:
+    """Paged-in older messages followed by the session window."""
+    older = _older_page(user_id, get_user_state(user_id, "current_chat_id"))
+    return (older["messages"] if older else []) + get_user_state(user_id, "chat_history", [])
+
+
+def load_older_messages(user_id: str, limit: int = CHAT_HISTORY_LIMIT) -> List[Dict]:
+    """
+    Page the previous ``limit`` messages of the current conversation in front of what is shown.
+
+    Paged-in messages stay out of the persisted ``chat_history`` key, so the
+    session store only ever holds the capped window.
+    """
+    chat_id = get_user_state(user_id, "current_chat_id")
+    stored = [message["id"] for message in visible_messages(user_id) if message.get("id") is not None]
+    if chat_id is None or not stored:
+        set_user_state(user_id, "chat_has_older", False)
+        return []
+
+    page = db.get_chat_messages(chat_id, limit=limit + 1, before_id=min(stored))
+    older = [_as_message(row) for row in page[-limit:]]
+    previous = _older_page(user_id, chat_id)
+    st.session_state[_older_key(user_id)] = {
+        "chat_id": chat_id,
+        "messages": older + (previous["messages"] if previous else []),
+        "has_more": len(page) > limit
+    }
+    return older
+
+
 def render_chat_interface():
     """Render the simplified chat interface exactly matching the design."""
     # Apply custom styles for the chat interface
@@ -34,12 +126,19 @@ def render_chat_interface():
     user_id = get_current_user_id()
     question = st.text_input("", key="chat_input", label_visibility="collapsed")
     
+    # Conversation so far; older messages are only loaded when asked for
+    if has_older_messages(user_id):
+        if st.button("Load earlier messages", use_container_width=True):
+            load_older_messages(user_id)
+            st.rerun()
+    for message in visible_messages(user_id):
+        with st.chat_message(message["role"]):
+            st.markdown(message["content"])
+    
     # Send button
     if st.button("Send", type="primary", use_container_width=True):
         if question.strip():
-            chat_history = get_user_state(user_id, "chat_history", [])
-            chat_history.append({"role": "user", "content": question})
-            set_user_state(user_id, "chat_history", chat_history)
+            append_chat_message(user_id, "user", question)
             st.rerun()
     
     # Back to Analysis button
@@ -47,5 +146,45 @@ def render_chat_interface():
         set_user_state(user_id, "selected_option", "home")
         st.rerun()
 
+def _open_from_history(user_id: str, chat_id: int, on_open: Optional[Callable[[], None]]):
+    open_conversation(user_id, chat_id)
+    set_user_state(user_id, "selected_option", "home")
+    if on_open is not None:
+        on_open()
+
+
+def render_chat_history(on_open: Optional[Callable[[], None]] = None):
+    """
+    List the user's conversations, newest activity first, a page at a time.
+
+    Clicking one opens it; ``on_open`` then runs (as a button callback, before
+    the rerun) so the caller can switch to the chat view.
+    """
+    user_id = get_current_user_id()
+    st.markdown("<h2 style='color: #1E1B4B; margin-bottom: 2rem;'>Chats history</h2>", unsafe_allow_html=True)
+
+    cursor = get_user_state(user_id, "chat_history_cursor")
+    try:
+        page = db.list_conversations(user_id, cursor=cursor)
+    except Exception as e:
+        st.error(f"Could not load conversations: {str(e)}")
+        return
+
+    if not page["conversations"]:
+        st.info("No conversations yet.")
+    for conversation in page["conversations"]:
+        label = conversation["title"] or f"Chat {conversation['id']}"
+        st.button(f"{label} · {conversation['updated_at']:%Y-%m-%d %H:%M}",
+                  key=f"open_chat_{conversation['id']}", use_container_width=True,
+                  on_click=_open_from_history, args=(user_id, conversation["id"], on_open))
+
+    col1, col2 = st.columns(2)
+    if cursor is not None and col1.button("Newest", use_container_width=True):
+        set_user_state(user_id, "chat_history_cursor", None)
+        st.rerun()
+    if page["next_cursor"] is not None and col2.button("Older", use_container_width=True):
+        set_user_state(user_id, "chat_history_cursor", page["next_cursor"])
+        st.rerun()
+
 if __name__ == "__main__":
     render_chat_interface()
\ No newline at end of file
@@ -1,10 +1,12 @@
 import streamlit as st
 from ai_utils import generate_marketing_content
-from database import db
-from emotion_engine import EmotionEngine, EmotionalProfile
+from database import db, get_writer
+from emotion_engine import EmotionalProfile, get_emotion_engine
 import json
 import html
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, Any, List
 
 # Define archetype behaviors with detailed attributes
@@ -98,44 +100,39 @@ TEMPLATES = {
     'isolated': "Promote independence and control with private solutions."
 }
 
-def generate_content_for_all_archetypes(story: str, content_type: str, platform: str, tone: str) -> Dict[str, Any]:
-    """Generate content for all archetypes simultaneously"""
-    archetypes = {
-        'autonomous': {
-            'tone': 'professional and data-driven',
-            'focus': 'efficiency and results',
-            'style': 'detailed and analytical'
-        },
-        'impulsive': {
-            'tone': 'urgent and emotional',
-            'focus': 'immediate benefits',
-            'style': 'dynamic and engaging'
-        },
-        'avoidant': {
-            'tone': 'gentle and reassuring',
-            'focus': 'comfort and simplicity',
-            'style': 'clear and comforting'
-        },
-        'isolated': {
-            'tone': 'respectful and private',
-            'focus': 'independence and control',
-            'style': 'detailed and personal'
-        }
+# Per-archetype writing traits used to build generation prompts
+ARCHETYPE_TRAITS = {
+    'autonomous': {
+        'tone': 'professional and data-driven',
+        'focus': 'efficiency and results',
+        'style': 'detailed and analytical'
+    },
+    'impulsive': {
+        'tone': 'urgent and emotional',
+        'focus': 'immediate benefits',
+        'style': 'dynamic and engaging'
+    },
+    'avoidant': {
+        'tone': 'gentle and reassuring',
+        'focus': 'comfort and simplicity',
+        'style': 'clear and comforting'
+    },
+    'isolated': {
+        'tone': 'respectful and private',
+        'focus': 'independence and control',
+        'style': 'detailed and personal'
     }
-    
-    results = {}
-    
-    for archetype, traits in archetypes.items():
-        try:
+}
 
-            for platform in archetype_behaviors[archetype]['platforms']:
-                recommended_content = platform_recommendations[platform]
-                
-            # Retrieve template for the archetype
-            template = TEMPLATES.get(archetype, "No specific template available.")
+# Upper bound on simultaneous OpenAI requests for a single generation
+MAX_GENERATION_WORKERS = 4
 
-            # Create prompt for this archetype
-            prompt = f"""
+def build_archetype_prompt(story: str, content_type: str, platform: str, tone: str,
+                           archetype: str, traits: Dict[str, str]) -> str:
+    """Build the generation prompt for a single archetype"""
+    template = TEMPLATES.get(archetype, "No specific template available.")
+
+    return f"""
             Story: {story}
             Content Type: {content_type}
             Platform: {platform}
@@ -148,48 +145,81 @@ def generate_content_for_all_archetypes(story: str, content_type: str, platform:
             Template Guidance: {template}
             """
 
-            # Generate content with proper error handling
-            try:
-                content = generate_marketing_content(prompt, content_type)
-            except Exception as e:
-                content = {
-                    'error': f"Content generation error: {str(e)}",
-                    'title': f"Error - {archetype}",
-                    'content': None,
-                    'keywords': [],
-                    'target_audience': ''
-                }
+def generate_archetype_content(archetype: str, prompt: str, content_type: str) -> Dict[str, Any]:
+    """Generate content for one archetype, recording its latency in seconds"""
+    started = time.perf_counter()
+    try:
+        content = generate_marketing_content(prompt, content_type)
+    except Exception as e:
+        content = {
+            'error': f"Content generation error: {str(e)}",
+            'title': f"Error - {archetype}",
+            'content': None,
+            'keywords': [],
+            'target_audience': ''
+        }
+    content['latency'] = round(time.perf_counter() - started, 3)
+    return content
+
+def generate_content_for_all_archetypes(story: str, content_type: str, platform: str, tone: str,
+                                        concurrent: bool = True,
+                                        max_workers: int = MAX_GENERATION_WORKERS) -> Dict[str, Any]:
+    """
+    Generate content for all archetypes.
 
-            # Get emotional profile with proper error handling
-            try:
-                emotional_profile = st.session_state.emotion_engine.analyze_emotional_context(
-                    archetype=archetype,
-                    brand_values=getattr(st.session_state, 'brand_values', {}),
-                    audience_data={'archetype': archetype}
-                )
+    With ``concurrent`` enabled the archetype prompts are sent through a bounded
+    thread pool, so the wall-clock time is roughly that of the slowest request.
+    Each archetype's result carries its own ``latency`` and errors stay isolated
+    to the archetype that raised them.
+    """
+    prompts = {
+        archetype: build_archetype_prompt(story, content_type, platform, tone, archetype, traits)
+        for archetype, traits in ARCHETYPE_TRAITS.items()
+    }
 
-                if emotional_profile:
-                    content['emotional_profile'] = {
-                        'primary_emotion': emotional_profile.primary_emotion,
-                        'intensity': emotional_profile.intensity,
-                        'triggers': emotional_profile.psychological_triggers
+    if concurrent and max_workers > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(prompts))) as executor:
+            futures = {
+                archetype: executor.submit(generate_archetype_content, archetype, prompt, content_type)
+                for archetype, prompt in prompts.items()
+            }
+            generated = {}
+            for archetype, future in futures.items():
+                try:
+                    generated[archetype] = future.result()
+                except Exception as e:
+                    generated[archetype] = {
+                        'error': f"Error processing {archetype}: {str(e)}",
+                        'content': None
                     }
-            except Exception as e:
-                content['emotional_profile'] = {
-                    'primary_emotion': archetype,
-                    'intensity': 0.5,
-                    'triggers': []
-                }
+    else:
+        generated = {
+            archetype: generate_archetype_content(archetype, prompt, content_type)
+            for archetype, prompt in prompts.items()
+        }
+
+    results = {}
 
-            results[archetype] = content
+    # Emotional profiles read session state, so they are attached on the script thread
+    for archetype, content in generated.items():
+        try:
+            emotional_profile = get_emotion_engine().analyze_emotional_context(
+                archetype=archetype,
+                brand_values=getattr(st.session_state, 'brand_values', {}),
+                audience_data={'archetype': archetype}
+            )
 
+            if emotional_profile:
+                content['emotional_profile'] = emotional_profile.to_dict()
         except Exception as e:
-            results[archetype] = {
-                'error': f"Error processing {archetype}: {str(e)}",
-                'content': None,
-                'emotional_profile': None
+            content['emotional_profile'] = {
+                'primary_emotion': archetype,
+                'intensity': 0.5,
+                'triggers': []
             }
 
+        results[archetype] = content
+
     return results
 
 def initialize_session_state():
@@ -203,8 +233,6 @@ def initialize_session_state():
             'competitor_insights': '',
             'generated_content': None
         }
-    if 'emotion_engine' not in st.session_state:
-        st.session_state.emotion_engine = EmotionEngine()
 
 def sanitize_input(text: str) -> str:
     """Sanitize input text to prevent injection and formatting issues"""
@@ -423,18 +451,24 @@ def render_content_generator():
                     
                     st.session_state.content_form_state['generated_content'] = all_content
                     
-                    # Save to database with proper error handling
-                    for archetype, content in all_content.items():
-                        if content and content.get('content'):
-                            try:
-                                db.save_campaign(
-                                    business_name=f"{story[:50]}_{archetype}",
-                                    campaign_type=content_type,
-                                    content=content['content'],
-                                    emotional_profile=content.get('emotional_profile', {})
-                                )
-                            except Exception as e:
-                                st.warning(f"Could not save {archetype} content to database: {str(e)}")
+                    # Hand the records to the background writer so the rerun doesn't wait on the
+                    # database; anything the full queue rejects is saved synchronously instead
+                    campaigns = [
+                        {
+                            "business_name": f"{story[:50]}_{archetype}",
+                            "campaign_type": content_type,
+                            "content": content['content'],
+                            "emotional_profile": content.get('emotional_profile', {})
+                        }
+                        for archetype, content in all_content.items()
+                        if content and content.get('content')
+                    ]
+                    writer = get_writer()
+                    pending = [c for c in campaigns if not writer.submit("campaign", c, block=False)]
+                    try:
+                        db.save_campaigns_bulk(pending)
+                    except Exception as e:
+                        st.warning(f"Could not save generated content to database: {str(e)}")
                     
                     st.rerun()
                     
@@ -465,6 +499,9 @@ def render_content_generator():
                     if content.get('error'):
                         st.error(content['error'])
                         continue
+
+                    if content.get('latency') is not None:
+                        st.caption(f"Generated in {content['latency']:.1f}s")
                         
                     # Display emotional profile
                     if content.get('emotional_profile'):
@@ -1,9 +1,9 @@
 import streamlit as st
 from utils.session_manager import get_user_state, set_user_state, get_current_user_id
-from emotion_engine import EmotionEngine
+from emotion_engine import get_emotion_engine
 
-# Initialize EmotionEngine
-emotion_engine = EmotionEngine()
+# Shared process-wide EmotionEngine
+emotion_engine = get_emotion_engine()
 
 def initialize_icp_state():
     """Initialize ICP session state."""
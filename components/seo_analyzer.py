@@ -1,16 +1,26 @@
 
 import streamlit as st
 from urllib.parse import urlparse
-import requests
 from utils.session_manager import initialize_session_state
-from bs4 import BeautifulSoup
+from utils.http_fetcher import fetch_url, iter_text
+from utils.page_cache import get_page_cache, conditional_headers
+from utils.html_extractor import extract_stream
+from utils.keyword_matcher import compile_matcher, hit_segments
+from components.site_crawler import crawl_site
+from archetype_scoring import ArchetypeScorer, normalize_percentages, rounded
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import re
 from collections import Counter
+from functools import lru_cache
 from langdetect import detect
 
+# Bump when build_analysis's output changes so cached analyses are rebuilt
+ANALYSIS_VERSION = 3
+# Visible text kept per page for language detection and keyword scoring
+VISIBLE_TEXT_CHARS = 3000
+
 def detect_language(text):
     try:
         return detect(text)
@@ -29,42 +39,107 @@ def get_stopwords(language):
             "we", "are", "has", "have", "been", "would", "could", "should", "will"
         }
 
-def analyze_webpage(url):
+def build_analysis(page, include_links=False):
+    visible_text = page["visible_text"]
+    language = detect_language(visible_text)
+
+    meta_keywords = []
+    if page["meta_keywords"]:
+        meta_keywords = [k.strip() for k in page["meta_keywords"].split(",")]
+
+    analysis = {
+        "title": page["title"],
+        "meta_description": page["meta_description"],
+        "meta_keywords": meta_keywords,
+        "headings": page["headings"],
+        "visible_text": visible_text,
+        "language": language
+    }
+    if include_links:
+        analysis["links"] = page["links"]
+    return analysis
+
+def fetch_page_analysis(url, include_links=False):
+    """
+    Fetch and analyze a page, revalidating against the page cache.
+
+    Cached pages are requested with If-None-Match/If-Modified-Since; a 304 reuses
+    the stored extraction without parsing. Fresh pages are streamed and parsed
+    up to the HTTP_MAX_PAGE_BYTES cap; every heading within the cap is kept,
+    since brand values and the mission fallback are derived from them.
+    Returns None for non-HTML responses.
+    """
+    cache = get_page_cache()
+    cached = cache.get(url) if cache else None
+    if cached and (cached["analysis_version"] != ANALYSIS_VERSION
+                   or (include_links and "links" not in cached["analysis"])):
+        cached = None
+
+    response = fetch_url(url, headers=conditional_headers(cached), timeout=10, stream=True)
+
+    if response.status_code == 304 and cached:
+        response.close()
+        cache.touch(url)
+        return cached["analysis"]
+
+    if "html" not in response.headers.get("Content-Type", "text/html"):
+        response.close()
+        return None
+
+    chunks = iter_text(response)
     try:
-        headers = {"User-Agent": "Mozilla/5.0"}
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        visible_text = " ".join([text for text in soup.stripped_strings 
-                               if any(c.isalpha() for c in text)])[:3000]
-        language = detect_language(visible_text)
-        title = soup.title.string if soup.title else ""
-        meta_description = soup.find("meta", {"name": "description"})
-        meta_description = meta_description["content"] if meta_description else ""
-
-        meta_keywords = []
-        keywords_meta = soup.find("meta", {"name": re.compile(r"keywords", re.I)})
-        if keywords_meta and keywords_meta.get("content"):
-            meta_keywords = [k.strip() for k in keywords_meta["content"].split(",")]
-
-        headings = []
-        for tag in soup.find_all(re.compile("^h[1-6]$")):
-            text = tag.get_text(strip=True)
-            if text and any(c.isalpha() for c in text):
-                headings.append(text)
+        page = extract_stream(
+            chunks,
+            base_url=response.url if include_links else None,
+            max_text_chars=VISIBLE_TEXT_CHARS,
+            alpha_only=True
+        )
+    finally:
+        chunks.close()
+
+    analysis = build_analysis(page, include_links)
+    if cache and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+        cache.set(url, response.headers, analysis, ANALYSIS_VERSION)
+    return analysis
 
-        return {
-            "title": title,
-            "meta_description": meta_description,
-            "meta_keywords": meta_keywords,
-            "headings": headings,
-            "visible_text": visible_text,
-            "language": language
-        }
+def analyze_webpage(url):
+    try:
+        analysis = fetch_page_analysis(url)
+        if analysis is None:
+            return {"error": "Error analyzing webpage: not an HTML page"}
+        return analysis
     except Exception as e:
         return {"error": f"Error analyzing webpage: {str(e)}"}
 
+def analyze_site_page(url):
+    """Run one crawled page through the analysis, brand/ICP mapping and archetype scoring pipeline."""
+    analysis = fetch_page_analysis(url, include_links=True)
+    if analysis is None:
+        return {"url": url, "error": "Not an HTML page", "links": []}
+
+    language = analysis.get("language", "en")
+    results = map_to_brand_values_and_icp(
+        analysis["visible_text"],
+        analysis["meta_description"],
+        analysis["headings"],
+        language
+    )
+    archetype_scores = calculate_archetype_scores(
+        analysis["meta_keywords"],
+        analysis["visible_text"],
+        language
+    )
+
+    return {
+        "url": url,
+        "title": analysis["title"],
+        "language": language,
+        "brand_values": results["brand_values"],
+        "icp_data": results["icp_data"],
+        "archetype_scores": archetype_scores,
+        "links": analysis["links"]
+    }
+
 def get_pain_point_indicators(language):
     if language == 'es':
         return ["sin", "falta", "necesita", "difícil", "problema", "busca", "quiere"]
@@ -146,36 +221,36 @@ def map_to_brand_values_and_icp(content, meta_description, headings, language):
     }
 
 def extract_pain_points(content, language):
-    pain_indicators = get_pain_point_indicators(language)
+    matcher = compile_matcher(tuple(get_pain_point_indicators(language)), boundary=None)
+    sentences = content.split(".")
     pain_points = []
 
-    for sentence in content.split("."):
-        if any(indicator in sentence.lower() for indicator in pain_indicators):
-            cleaned = sentence.strip()
-            if len(cleaned) > 10:
-                pain_points.append(cleaned)
+    for index in hit_segments(content.lower(), ".", matcher):
+        cleaned = sentences[index].strip()
+        if len(cleaned) > 10:
+            pain_points.append(cleaned)
 
     if not pain_points:
         return ["No specific pain points detected"] if language == 'en' else ["No se detectaron puntos de dolor específicos"]
 
     return pain_points[:3]
 
-def calculate_archetype_scores(meta_keywords, content, language):
-    keyword_map = get_keyword_map(language)
-    archetypes = {"Autonomous": 0, "Impulsive": 0, "Avoidant": 0}
+@lru_cache(maxsize=None)
+def get_archetype_scorer(language):
+    return ArchetypeScorer.from_keyword_map(get_keyword_map(language), ["Autonomous", "Impulsive", "Avoidant"])
 
-    words = re.findall(r'\w+', content.lower())
-    for word in words:
-        if word in keyword_map:
-            archetypes[keyword_map[word]] += 1
-
-    for keyword in meta_keywords:
-        keyword = keyword.lower().strip()
-        if keyword in keyword_map:
-            archetypes[keyword_map[keyword]] += 2
-
-    total = sum(archetypes.values()) or 1
-    return {k: round(v / total * 100, 2) for k, v in archetypes.items()}
+def calculate_archetype_scores(meta_keywords, content, language):
+    return calculate_archetype_scores_batch([(meta_keywords, content)], language)[0]
+
+def calculate_archetype_scores_batch(pages, language):
+    """Score many (meta_keywords, content) pages of one language with a single matrix product."""
+    scorer = get_archetype_scorer(language)
+    content_counts = scorer.count_texts([content.lower() for _, content in pages], boundary="word")
+    meta_counts = scorer.count_terms([
+        [keyword.lower().strip() for keyword in meta_keywords] for meta_keywords, _ in pages
+    ])
+    percentages = normalize_percentages(scorer.score(content_counts + 2 * meta_counts))
+    return [rounded(scores) for scores in scorer.to_dicts(percentages)]
 
 def generate_recommendations(archetype_scores, language):
     if language == 'es':
@@ -289,6 +364,11 @@ def render_results():
                 render_icp_card(st.session_state.webpage_analysis["icp_data"])
             
             render_recommendations_card(st.session_state.webpage_analysis["recommendations"])
+
+            if st.session_state.webpage_analysis.get("site_pages"):
+                st.markdown("### 🗺️ Pages Analyzed")
+                st.dataframe(pd.DataFrame(st.session_state.webpage_analysis["site_pages"]),
+                             use_container_width=True)
             
         with tab2:
             st.subheader("Brand Values")
@@ -311,8 +391,40 @@ def render_seo_analyzer():
     st.markdown("Analyze your website to optimize its SEO performance and gather insights for Brand Values and ICP.")
 
     url = st.text_input("Enter your website URL", placeholder="https://example.com")
+    crawl_entire_site = st.checkbox("Audit the whole site (follow links and sitemap.xml)")
+    page_budget = 100
+    if crawl_entire_site:
+        page_budget = st.number_input("Maximum pages to analyze", min_value=1, max_value=1000, value=100)
+
     if st.button("Analyze Website"):
-        if url and urlparse(url).scheme in ["http", "https"]:
+        if url and urlparse(url).scheme in ["http", "https"] and crawl_entire_site:
+            with st.spinner("Crawling your website..."):
+                site = crawl_site(url, analyze_site_page, max_pages=int(page_budget))
+                if not site["pages"]:
+                    errors = site["errors"]
+                    st.error(errors[0]["error"] if errors else "No pages could be analyzed.")
+                else:
+                    seed_page = site["pages"][0]
+                    language = seed_page.get("language", "en")
+                    recommendations = generate_recommendations(site["archetype_scores"], language)
+
+                    st.session_state.webpage_analysis.update({
+                        "url": url,
+                        "brand_values": seed_page["brand_values"],
+                        "icp_data": seed_page["icp_data"],
+                        "archetype_scores": site["archetype_scores"],
+                        "recommendations": recommendations,
+                        "site_pages": [
+                            {"url": page["url"], "title": page["title"], **page["archetype_scores"]}
+                            for page in site["pages"]
+                        ],
+                        "site_errors": site["errors"],
+                        "is_completed": True
+                    })
+
+                    st.success(f"Site audit completed: {site['pages_crawled']} pages analyzed.")
+                    render_results()
+        elif url and urlparse(url).scheme in ["http", "https"]:
             with st.spinner("Analyzing your website..."):
                 analysis = analyze_webpage(url)
                 if "error" in analysis:
@@ -338,6 +450,8 @@ def render_seo_analyzer():
                         "icp_data": results["icp_data"],
                         "archetype_scores": archetype_scores,
                         "recommendations": recommendations,
+                        "site_pages": [],
+                        "site_errors": [],
                         "is_completed": True
                     })
 
@@ -43,6 +43,7 @@ def render_sidebar():
             if st.button(label, key=f"menu_{value}", use_container_width=True):
                 if value == "new_chat":
                     set_user_state(user_id, "chat_history", [])
+                    set_user_state(user_id, "chat_has_older", False)
                     set_user_state(user_id, "current_chat_id", None)
                     set_user_state(user_id, "selected_option", "home")
                     set_user_state(user_id, "content_form_state", {
@@ -0,0 +1,173 @@
+import asyncio
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+from urllib.parse import urlparse, urljoin, urldefrag
+from utils.http_fetcher import fetch_url
+
+# Links to these resources are never worth fetching as pages
+SKIPPED_EXTENSIONS = (
+    ".jpg", ".jpeg", ".png", ".gif", ".svg", ".webp", ".ico", ".pdf", ".zip",
+    ".mp3", ".mp4", ".mov", ".avi", ".css", ".js", ".json", ".xml", ".woff", ".woff2"
+)
+
+def normalize_host(netloc: str) -> str:
+    """Lower-case a host and drop a leading 'www.' so both variants count as one site."""
+    netloc = netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+def parse_sitemap(xml_text: str) -> Dict[str, List[str]]:
+    """Split a sitemap document into page URLs and nested sitemap URLs."""
+    root = ET.fromstring(xml_text)
+    locations = [
+        element.text.strip() for element in root.iter()
+        if element.tag.endswith("loc") and element.text
+    ]
+    if root.tag.endswith("sitemapindex"):
+        return {"pages": [], "sitemaps": locations}
+    return {"pages": locations, "sitemaps": []}
+
+def aggregate_archetype_scores(pages: List[Dict]) -> Dict[str, float]:
+    """Average per-page archetype scores over the pages that matched any archetype keyword."""
+    totals = defaultdict(float)
+    scored_pages = 0
+    for page in pages:
+        scores = page.get("archetype_scores") or {}
+        if not any(scores.values()):
+            continue
+        scored_pages += 1
+        for archetype, score in scores.items():
+            totals[archetype] += score
+
+    if not scored_pages:
+        return {archetype: 0 for page in pages for archetype in page.get("archetype_scores", {})}
+    return {archetype: round(total / scored_pages, 2) for archetype, total in totals.items()}
+
+
+class SiteCrawler:
+    """
+    Breadth-first asyncio crawler over a single site.
+
+    Pages are discovered from the seed URL, same-domain links and sitemap.xml.
+    Blocking fetch/analysis work runs in worker threads, bounded per host by a
+    semaphore, and the crawl stops once ``max_pages`` URLs have been scheduled.
+    """
+
+    def __init__(self,
+                 seed_url: str,
+                 analyze_page: Callable[[str], Dict],
+                 max_pages: int = 100,
+                 per_host_concurrency: int = 4,
+                 use_sitemap: bool = True,
+                 fetch: Callable = fetch_url):
+        self.seed_url = urldefrag(seed_url)[0]
+        self.analyze_page = analyze_page
+        self.max_pages = max_pages
+        self.per_host_concurrency = per_host_concurrency
+        self.use_sitemap = use_sitemap
+        self.fetch = fetch
+        self.host = normalize_host(urlparse(self.seed_url).netloc)
+
+        self.pages: List[Dict] = []
+        self.errors: List[Dict] = []
+        self._seen: Dict[str, int] = {}
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def is_crawlable(self, url: str) -> bool:
+        parsed = urlparse(url)
+        return (
+            parsed.scheme in ("http", "https")
+            and normalize_host(parsed.netloc) == self.host
+            and not parsed.path.lower().endswith(SKIPPED_EXTENSIONS)
+        )
+
+    def _host_limit(self, url: str) -> asyncio.Semaphore:
+        host = urlparse(url).netloc
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_concurrency)
+        return self._host_limits[host]
+
+    def _enqueue(self, queue: asyncio.Queue, url: str):
+        url = urldefrag(url)[0]
+        if url in self._seen or len(self._seen) >= self.max_pages or not self.is_crawlable(url):
+            return
+        self._seen[url] = len(self._seen)
+        queue.put_nowait(url)
+
+    async def _sitemap_urls(self) -> List[str]:
+        """Read page URLs from /sitemap.xml, following one level of sitemap index."""
+        parsed = urlparse(self.seed_url)
+        pending = [urljoin(f"{parsed.scheme}://{parsed.netloc}", "/sitemap.xml")]
+        pages = []
+        for _ in range(2):
+            nested = []
+            for sitemap_url in pending:
+                try:
+                    async with self._host_limit(sitemap_url):
+                        response = await asyncio.to_thread(self.fetch, sitemap_url)
+                    sitemap = parse_sitemap(response.text)
+                except Exception:
+                    continue
+                pages.extend(sitemap["pages"])
+                nested.extend(sitemap["sitemaps"])
+            pending = nested
+        return pages
+
+    async def _worker(self, queue: asyncio.Queue):
+        while True:
+            url = await queue.get()
+            try:
+                async with self._host_limit(url):
+                    page = await asyncio.to_thread(self.analyze_page, url)
+                links = page.pop("links", [])
+                if page.get("error"):
+                    self.errors.append({"url": url, "error": page["error"]})
+                else:
+                    self.pages.append(page)
+                for link in links:
+                    self._enqueue(queue, link)
+            except Exception as e:
+                self.errors.append({"url": url, "error": str(e)})
+            finally:
+                queue.task_done()
+
+    async def crawl(self) -> Dict:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._enqueue(queue, self.seed_url)
+        if self.use_sitemap:
+            for url in await self._sitemap_urls():
+                self._enqueue(queue, url)
+
+        workers = [
+            asyncio.create_task(self._worker(queue))
+            for _ in range(max(1, self.per_host_concurrency))
+        ]
+        await queue.join()
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+
+        # Report pages in discovery order so the seed page always comes first
+        self.pages.sort(key=lambda page: self._seen.get(page["url"], len(self._seen)))
+        return {
+            "seed_url": self.seed_url,
+            "pages_crawled": len(self.pages),
+            "pages": self.pages,
+            "errors": self.errors,
+            "archetype_scores": aggregate_archetype_scores(self.pages)
+        }
+
+
+def crawl_site(seed_url: str, analyze_page: Callable[[str], Dict], max_pages: int = 100,
+               per_host_concurrency: int = 4, use_sitemap: bool = True,
+               fetch: Optional[Callable] = None) -> Dict:
+    """Crawl a site synchronously (for the Streamlit script thread) and aggregate archetype scores."""
+    crawler = SiteCrawler(
+        seed_url,
+        analyze_page,
+        max_pages=max_pages,
+        per_host_concurrency=per_host_concurrency,
+        use_sitemap=use_sitemap,
+        fetch=fetch or fetch_url
+    )
+    return asyncio.run(crawler.crawl())
@@ -1,20 +1,210 @@
 import os
+import re
+import time
+import atexit
+import hashlib
+import unicodedata
+import threading
+from contextlib import contextmanager
 import psycopg2
-from psycopg2.extras import RealDictCursor
+from psycopg2 import pool as pg_pool, sql
+from psycopg2.extras import RealDictCursor, Json, execute_values
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.write_behind import PERMANENT_ERRORS, WriteBehindQueue
 
-class Database:
-    def __init__(self):
-        self.conn = psycopg2.connect(
-            dbname=os.environ['PGDATABASE'],
-            user=os.environ['PGUSER'],
-            password=os.environ['PGPASSWORD'],
-            host=os.environ['PGHOST'],
-            port=os.environ['PGPORT']
+# Connection pool configuration (overridable through the environment)
+DB_POOL_MIN = int(os.environ.get("DB_POOL_MIN", 1))
+DB_POOL_MAX = int(os.environ.get("DB_POOL_MAX", 10))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", 30))
+DB_HEALTHCHECK_INTERVAL = float(os.environ.get("DB_HEALTHCHECK_INTERVAL", 30))
+DB_BULK_PAGE_SIZE = int(os.environ.get("DB_BULK_PAGE_SIZE", 1000))
+CAMPAIGN_PAGE_SIZE = int(os.environ.get("CAMPAIGN_PAGE_SIZE", 50))
+CHAT_PAGE_SIZE = int(os.environ.get("CHAT_PAGE_SIZE", 50))
+
+# Ordered schema migrations, applied once each and recorded in schema_migrations
+MIGRATIONS = [
+    (1, "ALTER TABLE campaigns ADD COLUMN IF NOT EXISTS emotional_profile JSONB"),
+    (2, """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_campaigns_business_created
+        ON campaigns (business_name, created_at DESC, id DESC)
+    """),
+    (3, """
+        ALTER TABLE audience_analysis
+            ADD COLUMN IF NOT EXISTS description_hash TEXT,
+            ADD COLUMN IF NOT EXISTS analysis JSONB
+    """),
+    (4, """
+        CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_audience_analysis_hash
+        ON audience_analysis (description_hash, created_at DESC)
+    """),
+    (5, """
+        CREATE TABLE IF NOT EXISTS user_session (
+            user_id TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value JSONB NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (user_id, key)
         )
+    """),
+    (6, """
+        CREATE TABLE IF NOT EXISTS conversations (
+            id SERIAL PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            title TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_conversations_user_updated
+        ON conversations (user_id, updated_at DESC, id DESC)
+    """),
+    (7, """
+        CREATE TABLE IF NOT EXISTS chat_messages (
+            id BIGSERIAL PRIMARY KEY,
+            conversation_id INTEGER NOT NULL REFERENCES conversations (id) ON DELETE CASCADE,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        );
+        CREATE INDEX IF NOT EXISTS idx_chat_messages_conversation
+        ON chat_messages (conversation_id, id DESC)
+    """),
+]
+
+# Index builds on large tables, run with CONCURRENTLY outside a transaction: version -> index name
+CONCURRENT_MIGRATIONS = {
+    2: "idx_campaigns_business_created",
+    4: "idx_audience_analysis_hash"
+}
+
+CAMPAIGN_COLUMNS = ("id", "business_name", "campaign_type", "content", "emotional_profile", "created_at")
+# History listings skip the content body and profile
+CAMPAIGN_SUMMARY_COLUMNS = ("id", "business_name", "campaign_type", "created_at")
+
+
+def normalize_description(text: str) -> str:
+    """Reduce a business description to its material content: case, punctuation and spacing are ignored."""
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return " ".join(re.sub(r"\W+", " ", text).split())
+
+
+def description_hash(text: str) -> str:
+    return hashlib.sha256(normalize_description(text).encode("utf-8")).hexdigest()
+
+
+def connection_params():
+    """Connection parameters taken from the standard PG* environment variables."""
+    return {
+        "dbname": os.environ['PGDATABASE'],
+        "user": os.environ['PGUSER'],
+        "password": os.environ['PGPASSWORD'],
+        "host": os.environ['PGHOST'],
+        "port": os.environ['PGPORT']
+    }
+
+
+class ConnectionPool:
+    """
+    Thread-safe psycopg2 pool shared by every Streamlit session.
+
+    Checkouts block (up to ``timeout``) instead of failing when all connections
+    are busy. Connections idle longer than the health-check interval are pinged
+    before use, and connections that are closed or fail with a connection error
+    are discarded so the pool reconnects.
+    """
+
+    def __init__(self, minconn=DB_POOL_MIN, maxconn=DB_POOL_MAX, timeout=DB_POOL_TIMEOUT,
+                 healthcheck_interval=DB_HEALTHCHECK_INTERVAL, **params):
+        self.timeout = timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._pool = pg_pool.ThreadedConnectionPool(minconn, maxconn, **(params or connection_params()))
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self._last_used = {}
+
+    def _is_healthy(self, conn):
+        if conn.closed:
+            return False
+        if time.monotonic() - self._last_used.get(id(conn), 0) < self.healthcheck_interval:
+            return True
+        try:
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.rollback()
+            return True
+        except psycopg2.Error:
+            return False
+
+    def _discard(self, conn):
+        self._last_used.pop(id(conn), None)
+        self._pool.putconn(conn, close=True)
+
+    def getconn(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise pg_pool.PoolError("Timed out waiting for a database connection")
+        try:
+            for _ in range(3):
+                conn = self._pool.getconn()
+                if self._is_healthy(conn):
+                    return conn
+                self._discard(conn)
+            return self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def putconn(self, conn, broken=False):
+        try:
+            if broken or conn.closed:
+                self._discard(conn)
+            else:
+                self._last_used[id(conn)] = time.monotonic()
+                self._pool.putconn(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def connection(self):
+        """Check out a connection; commit on success, roll back on error, always return it."""
+        conn = self.getconn()
+        broken = False
+        try:
+            yield conn
+            conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            if not conn.closed:
+                conn.rollback()
+            raise
+        finally:
+            self.putconn(conn, broken=broken)
+
+    def closeall(self):
+        self._pool.closeall()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide connection pool, creating it on first use."""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool()
+    return _pool
+
+
+class Database:
+    def __init__(self, pool=None):
+        self.pool = pool or get_pool()
         self.create_tables()
+        self.migrate()
 
     def create_tables(self):
-        with self.conn.cursor() as cur:
+        with self.pool.connection() as conn, conn.cursor() as cur:
             cur.execute("""
                 CREATE TABLE IF NOT EXISTS campaigns (
                     id SERIAL PRIMARY KEY,
@@ -30,24 +220,279 @@ class Database:
                     insights TEXT,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 );
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    version INTEGER PRIMARY KEY,
+                    applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
             """)
-            self.conn.commit()
 
-    def save_campaign(self, business_name, campaign_type, content):
-        with self.conn.cursor() as cur:
+    def migrate(self):
+        """Apply pending MIGRATIONS in order; an advisory lock keeps concurrent app starts from racing."""
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT pg_advisory_xact_lock(hashtext('schema_migrations'))")
+            cur.execute("SELECT version FROM schema_migrations")
+            applied = {row[0] for row in cur.fetchall()}
+            for version, statement in MIGRATIONS:
+                if version in applied or version in CONCURRENT_MIGRATIONS:
+                    continue
+                cur.execute(statement)
+                cur.execute("INSERT INTO schema_migrations (version) VALUES (%s)", (version,))
+
+        pending = [(version, statement) for version, statement in MIGRATIONS
+                   if version in CONCURRENT_MIGRATIONS and version not in applied]
+        if pending:
+            self._migrate_concurrently(pending)
+
+    def _migrate_concurrently(self, migrations):
+        """
+        Build indexes with CREATE INDEX CONCURRENTLY, which cannot run in a transaction.
+
+        Writes to the table continue while the index builds. One replica builds
+        at a time; the others skip instead of waiting at startup, and the index
+        is recorded as applied once the build finishes.
+        """
+        with self.pool.connection() as conn:
+            conn.rollback()
+            conn.autocommit = True
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT pg_try_advisory_lock(hashtext('schema_migrations_concurrent'))")
+                    if not cur.fetchone()[0]:
+                        return
+                    try:
+                        for version, statement in migrations:
+                            cur.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+                            if cur.fetchone():
+                                continue
+                            # An interrupted build leaves an invalid index that IF NOT EXISTS would keep
+                            index = CONCURRENT_MIGRATIONS[version]
+                            cur.execute("""
+                                SELECT 1 FROM pg_index JOIN pg_class ON pg_class.oid = pg_index.indexrelid
+                                WHERE pg_class.relname = %s AND NOT pg_index.indisvalid
+                            """, (index,))
+                            if cur.fetchone():
+                                cur.execute(sql.SQL("DROP INDEX CONCURRENTLY IF EXISTS {}").format(sql.Identifier(index)))
+                            cur.execute(statement)
+                            cur.execute(
+                                "INSERT INTO schema_migrations (version) VALUES (%s) ON CONFLICT DO NOTHING",
+                                (version,)
+                            )
+                    finally:
+                        cur.execute("SELECT pg_advisory_unlock(hashtext('schema_migrations_concurrent'))")
+            finally:
+                conn.autocommit = False
+
+    def save_campaign(self, business_name, campaign_type, content, emotional_profile=None):
+        return self.save_campaigns_bulk([{
+            "business_name": business_name,
+            "campaign_type": campaign_type,
+            "content": content,
+            "emotional_profile": emotional_profile
+        }])[0]
+
+    def save_campaigns_bulk(self, campaigns: List[Dict], page_size: int = DB_BULK_PAGE_SIZE) -> List[int]:
+        """
+        Insert many campaigns in a single transaction and return their ids in input order.
+
+        Each campaign is a dict with business_name, campaign_type, content and an
+        optional emotional_profile dict (stored as JSONB). Rows are sent as
+        multi-row INSERTs of ``page_size`` rows; any failure rolls back the batch.
+        """
+        if not campaigns:
+            return []
+        rows = [
+            (
+                campaign["business_name"],
+                campaign.get("campaign_type"),
+                campaign["content"],
+                Json(campaign["emotional_profile"]) if campaign.get("emotional_profile") is not None else None
+            )
+            for campaign in campaigns
+        ]
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            # Inserting in ordinal order makes the serial ids ascend with the input order
+            inserted = execute_values(
+                cur,
+                """
+                INSERT INTO campaigns (business_name, campaign_type, content, emotional_profile)
+                SELECT v.business_name, v.campaign_type, v.content, v.emotional_profile::jsonb
+                FROM (VALUES %s) AS v (ordinal, business_name, campaign_type, content, emotional_profile)
+                ORDER BY v.ordinal
+                RETURNING id
+                """,
+                [(ordinal,) + row for ordinal, row in enumerate(rows)],
+                page_size=page_size,
+                fetch=True
+            )
+            return sorted(row[0] for row in inserted)
+
+    def save_audience_analysis(self, description: str, analysis: Dict, business_id: Optional[int] = None) -> int:
+        return self.save_audience_analyses_bulk([{
+            "description": description,
+            "analysis": analysis,
+            "business_id": business_id
+        }])[0]
+
+    def save_audience_analyses_bulk(self, analyses: List[Dict]) -> List[int]:
+        """
+        Insert audience analyses in one transaction.
+
+        Each record has the business ``description`` it was generated from, the
+        ``analysis`` dict (stored as JSONB) and an optional business_id.
+        """
+        if not analyses:
+            return []
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            inserted = execute_values(
+                cur,
+                """
+                INSERT INTO audience_analysis (business_id, description_hash, demographics, analysis)
+                VALUES %s RETURNING id
+                """,
+                [
+                    (
+                        record.get("business_id"),
+                        description_hash(record["description"]),
+                        Json(record["analysis"].get("demographics")),
+                        Json(record["analysis"])
+                    )
+                    for record in analyses
+                ],
+                fetch=True
+            )
+            return [row[0] for row in inserted]
+
+    def get_audience_analysis(self, description: str) -> Optional[Dict]:
+        """Return the latest stored analysis for a materially identical description, or None."""
+        with self.pool.connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
             cur.execute(
-                "INSERT INTO campaigns (business_name, campaign_type, content) VALUES (%s, %s, %s) RETURNING id",
-                (business_name, campaign_type, content)
+                """
+                SELECT id, analysis, created_at FROM audience_analysis
+                WHERE description_hash = %s AND analysis IS NOT NULL
+                ORDER BY created_at DESC LIMIT 1
+                """,
+                (description_hash(description),)
+            )
+            return cur.fetchone()
+
+    def get_campaigns(self, business_name, columns: Optional[Sequence[str]] = None,
+                      limit: Optional[int] = None, cursor: Optional[Tuple] = None):
+        """
+        Return a tenant's campaigns, newest first.
+
+        ``columns`` projects the result (default: every column). ``limit`` and
+        ``cursor`` page through history by keyset: pass the ``(created_at, id)``
+        of the last row seen to get the rows after it. Served by the
+        (business_name, created_at, id) index.
+        """
+        columns = list(columns or CAMPAIGN_COLUMNS)
+        unknown = set(columns) - set(CAMPAIGN_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown campaign columns: {', '.join(sorted(unknown))}")
+
+        query = [sql.SQL("SELECT {} FROM campaigns WHERE business_name = %s").format(
+            sql.SQL(", ").join(map(sql.Identifier, columns))
+        )]
+        params = [business_name]
+        if cursor is not None:
+            query.append(sql.SQL("AND (created_at, id) < (%s, %s)"))
+            params.extend(cursor)
+        query.append(sql.SQL("ORDER BY created_at DESC, id DESC"))
+        if limit is not None:
+            query.append(sql.SQL("LIMIT %s"))
+            params.append(limit)
+
+        with self.pool.connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(sql.SQL(" ").join(query), params)
+            return cur.fetchall()
+
+    def get_campaign_page(self, business_name, cursor: Optional[Tuple] = None,
+                          limit: int = CAMPAIGN_PAGE_SIZE,
+                          columns: Sequence[str] = CAMPAIGN_SUMMARY_COLUMNS) -> Dict:
+        """Fetch one page of campaign history plus the cursor for the next page (None at the end)."""
+        columns = list(dict.fromkeys(list(columns) + ["created_at", "id"]))
+        rows = self.get_campaigns(business_name, columns=columns, limit=limit + 1, cursor=cursor)
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "campaigns": rows,
+            "next_cursor": (rows[-1]["created_at"], rows[-1]["id"]) if has_more else None
+        }
+
+    def create_conversation(self, user_id, title: Optional[str] = None) -> int:
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO conversations (user_id, title) VALUES (%s, %s) RETURNING id",
+                (str(user_id), title)
             )
-            self.conn.commit()
             return cur.fetchone()[0]
 
-    def get_campaigns(self, business_name):
-        with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
+    def save_chat_message(self, conversation_id: int, role: str, content: str) -> int:
+        """Append a message to a conversation and bump the conversation's updated_at."""
+        with self.pool.connection() as conn, conn.cursor() as cur:
             cur.execute(
-                "SELECT * FROM campaigns WHERE business_name = %s ORDER BY created_at DESC",
-                (business_name,)
+                "INSERT INTO chat_messages (conversation_id, role, content) VALUES (%s, %s, %s) RETURNING id",
+                (conversation_id, role, content)
             )
-            return cur.fetchall()
+            message_id = cur.fetchone()[0]
+            cur.execute(
+                "UPDATE conversations SET updated_at = CURRENT_TIMESTAMP WHERE id = %s",
+                (conversation_id,)
+            )
+            return message_id
+
+    def get_chat_messages(self, conversation_id: int, limit: int = CHAT_PAGE_SIZE,
+                          before_id: Optional[int] = None) -> List[Dict]:
+        """Return up to ``limit`` messages older than ``before_id`` (default: the latest), oldest first."""
+        query = "SELECT id, role, content, created_at FROM chat_messages WHERE conversation_id = %s"
+        params = [conversation_id]
+        if before_id is not None:
+            query += " AND id < %s"
+            params.append(before_id)
+        query += " ORDER BY id DESC LIMIT %s"
+        params.append(limit)
+        with self.pool.connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            return list(reversed(cur.fetchall()))
+
+    def list_conversations(self, user_id, limit: int = CHAT_PAGE_SIZE,
+                           cursor: Optional[Tuple] = None) -> Dict:
+        """Page through a user's conversations, most recently active first, by (updated_at, id) keyset."""
+        query = "SELECT id, title, created_at, updated_at FROM conversations WHERE user_id = %s"
+        params = [str(user_id)]
+        if cursor is not None:
+            query += " AND (updated_at, id) < (%s, %s)"
+            params.extend(cursor)
+        query += " ORDER BY updated_at DESC, id DESC LIMIT %s"
+        params.append(limit + 1)
+        with self.pool.connection() as conn, conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute(query, params)
+            rows = cur.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        return {
+            "conversations": rows,
+            "next_cursor": (rows[-1]["updated_at"], rows[-1]["id"]) if has_more else None
+        }
 
 db = Database()
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_writer() -> WriteBehindQueue:
+    """Return the shared write-behind queue for campaign and audience analysis records."""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = WriteBehindQueue(
+                    {
+                        "campaign": db.save_campaigns_bulk,
+                        "audience_analysis": db.save_audience_analyses_bulk
+                    },
+                    permanent_errors=PERMANENT_ERRORS + (psycopg2.DataError, psycopg2.IntegrityError)
+                )
+                atexit.register(_writer.drain, 10)
+    return _writer
@@ -1,83 +1,200 @@
-from typing import Dict, List, Optional
+import os
+import sys
+import threading
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
 import numpy as np
 from dataclasses import dataclass, asdict
 import json
 import logging
+from utils.keyword_matcher import compile_matcher, hit_segments
+from archetype_scoring import ArchetypeScorer
+from utils.tone_model import get_tone_batcher
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
 
-@dataclass
+@lru_cache(maxsize=4096)
+def _canonical_tuple(values: Tuple[str, ...]) -> Tuple[str, ...]:
+    return tuple(sys.intern(value) for value in values)
+
+
+def intern_tuple(values: Iterable[str]) -> Tuple[str, ...]:
+    """Return the one shared tuple of interned strings for a sequence of names."""
+    return _canonical_tuple(tuple(values))
+
+
+@dataclass(frozen=True, slots=True)
 class EmotionalProfile:
+    """
+    Immutable emotional analysis result.
+
+    Profiles are shared by reference (personas, content pieces, batch rows),
+    so trigger and emotion sequences are interned tuples and content_tone must
+    be treated as read-only.
+    """
     primary_emotion: str
     intensity: float
-    secondary_emotions: List[str]
-    psychological_triggers: List[str]
+    secondary_emotions: Tuple[str, ...]
+    psychological_triggers: Tuple[str, ...]
     content_tone: Dict[str, float]
 
+    def to_dict(self) -> Dict:
+        return {
+            'primary_emotion': self.primary_emotion,
+            'intensity': self.intensity,
+            'triggers': list(self.psychological_triggers)
+        }
+
     def to_json(self) -> str:
         """Serialize the emotional profile to JSON."""
         return json.dumps(asdict(self), indent=4)
 
 
+# Per-archetype base tables: emotion vector, psychological triggers, content tone, secondary emotions
+EMOTION_VECTORS = {
+    'autonomous': (0.8, 0.2, 0.1, 0.7),  # Logic, Independence, Control, Achievement
+    'impulsive': (0.3, 0.9, 0.7, 0.2),  # Excitement, Urgency, Desire, Spontaneity
+    'isolative': (0.6, 0.2, 0.8, 0.3),  # Safety, Privacy, Comfort, Reflection
+    'avoidant': (0.2, 0.1, 0.9, 0.4)    # Security, Distance, Protection, Peace
+}
+
+TRIGGER_MAPPINGS = {
+    'autonomous': (
+        'achievement', 'control', 'efficiency', 'mastery',
+        'independence', 'competence', 'growth', 'recognition'
+    ),
+    'impulsive': (
+        'urgency', 'excitement', 'novelty', 'pleasure',
+        'instant gratification', 'social proof', 'fomo', 'status'
+    ),
+    'isolative': (
+        'safety', 'comfort', 'privacy', 'peace',
+        'reflection', 'authenticity', 'simplicity', 'harmony'
+    ),
+    'avoidant': (
+        'security', 'protection', 'stability', 'predictability',
+        'certainty', 'familiarity', 'trust', 'reliability'
+    )
+}
+
+TONE_MAPPINGS = {
+    'autonomous': {
+        'professional': 0.8,
+        'authoritative': 0.7,
+        'direct': 0.9,
+        'analytical': 0.8
+    },
+    'impulsive': {
+        'energetic': 0.9,
+        'persuasive': 0.8,
+        'urgent': 0.7,
+        'exciting': 0.8
+    },
+    'isolative': {
+        'calm': 0.8,
+        'reassuring': 0.7,
+        'authentic': 0.9,
+        'empathetic': 0.6
+    },
+    'avoidant': {
+        'gentle': 0.8,
+        'supportive': 0.7,
+        'non-threatening': 0.9,
+        'encouraging': 0.6
+    }
+}
+
+# Content whose detected tone scores below this alignment with its target gets a tone-setting line
+TONE_MIN_ALIGNMENT = float(os.environ.get("TONE_MIN_ALIGNMENT", 0.2))
+
+TONE_PHRASES = {
+    'professional': "Our team brings proven expertise to every detail.",
+    'authoritative': "Backed by research and trusted by industry leaders.",
+    'direct': "Get started today.",
+    'analytical': "The results speak for themselves.",
+    'energetic': "Let's go!",
+    'persuasive': "Imagine what you could do with it.",
+    'urgent': "Act now before it's gone.",
+    'exciting': "This is just the beginning!",
+    'calm': "Take your time; there's no rush.",
+    'reassuring': "You're in safe hands.",
+    'authentic': "No gimmicks, just honest value.",
+    'empathetic': "We understand how you feel.",
+    'gentle': "Whenever you're ready, we're here.",
+    'supportive': "We're here to help every step of the way.",
+    'non-threatening': "No pressure, no commitment.",
+    'encouraging': "You can do this, one step at a time."
+}
+
+SECONDARY_EMOTIONS = {
+    'autonomous': ('confident', 'determined', 'focused', 'ambitious'),
+    'impulsive': ('excited', 'passionate', 'energetic', 'enthusiastic'),
+    'isolative': ('peaceful', 'content', 'mindful', 'balanced'),
+    'avoidant': ('cautious', 'careful', 'measured', 'reserved')
+}
+
+
+class ArchetypeTables(NamedTuple):
+    """Everything about one archetype that does not depend on the brand or audience."""
+    intensity_base: float
+    triggers: Tuple[str, ...]
+    trigger_text: str
+    tone: Mapping[str, float]
+    secondary_emotions: Tuple[str, ...]
+
+
+def _frozen_array(values) -> np.ndarray:
+    array = np.array(values)
+    array.setflags(write=False)
+    return array
+
+
 class EmotionEngine:
+    """
+    Read-only emotional analysis tables plus the per-call scoring on top of them.
+
+    All archetype tables are built and frozen once in the constructor, so a
+    single engine (see ``get_emotion_engine``) can be shared by every session
+    and thread.
+    """
+
     def __init__(self):
-        # Initialize emotion vectors for different archetypes
-        self.emotion_vectors = {
-            'autonomous': np.array([0.8, 0.2, 0.1, 0.7]),  # Logic, Independence, Control, Achievement
-            'impulsive': np.array([0.3, 0.9, 0.7, 0.2]),  # Excitement, Urgency, Desire, Spontaneity
-            'isolative': np.array([0.6, 0.2, 0.8, 0.3]),  # Safety, Privacy, Comfort, Reflection
-            'avoidant': np.array([0.2, 0.1, 0.9, 0.4])    # Security, Distance, Protection, Peace
-        }
+        self.emotion_vectors = MappingProxyType(
+            {archetype: _frozen_array(vector) for archetype, vector in EMOTION_VECTORS.items()}
+        )
+        self.trigger_mappings = MappingProxyType(
+            {archetype: intern_tuple(triggers) for archetype, triggers in TRIGGER_MAPPINGS.items()}
+        )
+        self.tone_mappings = MappingProxyType(
+            {archetype: MappingProxyType(dict(tone)) for archetype, tone in TONE_MAPPINGS.items()}
+        )
 
-        # Psychological trigger mappings
-        self.trigger_mappings = {
-            'autonomous': [
-                'achievement', 'control', 'efficiency', 'mastery',
-                'independence', 'competence', 'growth', 'recognition'
-            ],
-            'impulsive': [
-                'urgency', 'excitement', 'novelty', 'pleasure',
-                'instant gratification', 'social proof', 'fomo', 'status'
-            ],
-            'isolative': [
-                'safety', 'comfort', 'privacy', 'peace',
-                'reflection', 'authenticity', 'simplicity', 'harmony'
-            ],
-            'avoidant': [
-                'security', 'protection', 'stability', 'predictability',
-                'certainty', 'familiarity', 'trust', 'reliability'
-            ]
-        }
+        # Trigger keywords scored as a share of each archetype's trigger list
+        self.alignment_scorer = ArchetypeScorer.from_keyword_lists(
+            {archetype: list(triggers) for archetype, triggers in TRIGGER_MAPPINGS.items()}, normalize=True
+        )
 
-        # Content tone mappings
-        self.tone_mappings = {
-            'autonomous': {
-                'professional': 0.8,
-                'authoritative': 0.7,
-                'direct': 0.9,
-                'analytical': 0.8
-            },
-            'impulsive': {
-                'energetic': 0.9,
-                'persuasive': 0.8,
-                'urgent': 0.7,
-                'exciting': 0.8
-            },
-            'isolative': {
-                'calm': 0.8,
-                'reassuring': 0.7,
-                'authentic': 0.9,
-                'empathetic': 0.6
-            },
-            'avoidant': {
-                'gentle': 0.8,
-                'supportive': 0.7,
-                'non-threatening': 0.9,
-                'encouraging': 0.6
-            }
-        }
+        self.archetype_tables = MappingProxyType({
+            archetype: ArchetypeTables(
+                intensity_base=float(np.mean(vector)),
+                triggers=self.trigger_mappings[archetype],
+                trigger_text="\n".join(self.trigger_mappings[archetype]),
+                tone=self.tone_mappings[archetype],
+                secondary_emotions=intern_tuple(SECONDARY_EMOTIONS[archetype])
+            )
+            for archetype, vector in self.emotion_vectors.items()
+        })
+
+        # Stacked archetype x dimension matrix for batch analysis
+        self.archetype_names = tuple(self.emotion_vectors)
+        self.archetype_index = MappingProxyType({name: index for index, name in enumerate(self.archetype_names)})
+        self.emotion_matrix = _frozen_array(np.vstack([self.emotion_vectors[name] for name in self.archetype_names]))
+        self.secondary_counts = _frozen_array(
+            [len(self.archetype_tables[name].secondary_emotions) for name in self.archetype_names]
+        )
 
     def analyze_emotional_context(self, 
                                   archetype: str, 
@@ -87,22 +204,22 @@ class EmotionEngine:
         Analyze emotional context based on archetype, brand values, and audience data
         """
         try:
-            # Get base emotional vector for archetype
-            base_vector = self.emotion_vectors.get(archetype.lower())
-            if base_vector is None:
+            # Get the precomputed tables for the archetype
+            tables = self.archetype_tables.get(archetype.lower())
+            if tables is None:
                 return None
 
             # Calculate emotional intensity based on audience data
-            intensity = self._calculate_emotional_intensity(base_vector, audience_data)
+            intensity = self._calculate_emotional_intensity(tables.intensity_base, audience_data)
 
             # Get psychological triggers
-            triggers = self._get_psychological_triggers(archetype, brand_values)
+            triggers = self._get_psychological_triggers(tables, brand_values)
 
             # Get content tone mapping
-            tone = self._get_content_tone(archetype, brand_values)
+            tone = self._get_content_tone(tables, brand_values)
 
             # Get secondary emotions
-            secondary_emotions = self._get_secondary_emotions(archetype, intensity)
+            secondary_emotions = self._get_secondary_emotions(tables, intensity)
 
             return EmotionalProfile(
                 primary_emotion=archetype,
@@ -115,103 +232,239 @@ class EmotionEngine:
             logging.error(f"Error in emotional context analysis: {str(e)}")
             return None
 
-    def _calculate_emotional_intensity(self, base_vector: np.ndarray, audience_data: dict) -> float:
+    def _calculate_emotional_intensity(self, intensity_base: float, audience_data: dict) -> float:
         """Calculate emotional intensity using engagement, sentiment, and archetype importance."""
         try:
             engagement = audience_data.get('engagement_rate', 0.5)
             sentiment = audience_data.get('sentiment_score', 0.5)
             archetype_importance = audience_data.get('archetype_importance', 1.0)
 
-            intensity = np.mean(base_vector) * engagement * sentiment * archetype_importance
-            return float(np.clip(intensity, 0.1, 1.0))
+            intensity = intensity_base * engagement * sentiment * archetype_importance
+            return float(min(max(intensity, 0.1), 1.0))
         except Exception as e:
             logging.error(f"Error in calculating emotional intensity: {e}")
             return 0.5
 
-    def _get_psychological_triggers(self, archetype: str, brand_values: dict) -> List[str]:
+    def _get_psychological_triggers(self, tables: ArchetypeTables, brand_values: dict) -> Tuple[str, ...]:
         """Get psychological triggers based on archetype, brand values, and mission/vision."""
         try:
-            base_triggers = self.trigger_mappings.get(archetype.lower(), [])
+            base_triggers = tables.triggers
             brand_keywords = brand_values.get('keywords', [])
             mission_keywords = brand_values.get('mission', '').lower().split()
             vision_keywords = brand_values.get('vision', '').lower().split()
 
-            combined_triggers = []
-            for trigger in base_triggers:
-                if any(keyword in trigger for keyword in brand_keywords + mission_keywords + vision_keywords):
-                    combined_triggers.insert(0, trigger)
-                else:
-                    combined_triggers.append(trigger)
+            # One pass over all triggers finds which ones contain any brand keyword
+            matcher = compile_matcher(tuple(brand_keywords + mission_keywords + vision_keywords), boundary=None)
+            matched = set(hit_segments(tables.trigger_text, "\n", matcher))
 
-            return combined_triggers[:5]
+            # Matched triggers go first (most recently matched leading), the rest keep their order
+            combined_triggers = [trigger for index, trigger in enumerate(base_triggers) if index in matched][::-1]
+            combined_triggers += [trigger for index, trigger in enumerate(base_triggers) if index not in matched]
+
+            return intern_tuple(combined_triggers[:5])
         except Exception as e:
             logging.error(f"Error in getting psychological triggers: {e}")
-            return []
+            return ()
+
+    def analyze_emotional_context_batch(self,
+                                        archetypes: Sequence[str],
+                                        brand_values: dict,
+                                        engagement_rate=0.5,
+                                        sentiment_score=0.5,
+                                        archetype_importance=1.0,
+                                        columnar: bool = False):
+        """
+        Analyze many personas against one brand at once.
+
+        ``engagement_rate``, ``sentiment_score`` and ``archetype_importance`` are
+        scalars or arrays aligned with ``archetypes``. Intensities come from one
+        NumPy expression over the stacked archetype matrix; triggers and tone
+        depend only on the archetype and brand, so they are computed once per
+        distinct archetype. Returns a list of profiles (None for unknown
+        archetypes), or with ``columnar=True`` a dict of parallel columns whose
+        trigger lists and tone dicts are shared between rows of the same
+        archetype and must not be mutated.
+        """
+        keys = [archetype.lower() if isinstance(archetype, str) else None for archetype in archetypes]
+        rows = np.array([self.archetype_index.get(key, -1) for key in keys], dtype=int)
+        valid = rows >= 0
+        safe_rows = np.where(valid, rows, 0)
+
+        intensities = np.clip(
+            self.emotion_matrix[safe_rows].mean(axis=1)
+            * np.asarray(engagement_rate, dtype=float)
+            * np.asarray(sentiment_score, dtype=float)
+            * np.asarray(archetype_importance, dtype=float),
+            0.1, 1.0
+        )
+        intensities = np.broadcast_to(intensities, rows.shape)
+        secondary_counts = np.maximum(2, (intensities * self.secondary_counts[safe_rows]).astype(int))
+
+        per_archetype = {}
+        for key in dict.fromkeys(key for key, ok in zip(keys, valid) if ok):
+            tables = self.archetype_tables[key]
+            per_archetype[key] = (
+                self._get_psychological_triggers(tables, brand_values),
+                self._get_content_tone(tables, brand_values),
+                tables.secondary_emotions
+            )
+
+        columns = {
+            "primary_emotion": list(archetypes),
+            "valid": valid,
+            "intensity": np.where(valid, intensities, np.nan),
+            "secondary_emotions": [],
+            "psychological_triggers": [],
+            "content_tone": []
+        }
+        for key, ok, count in zip(keys, valid, secondary_counts):
+            triggers, tone, secondary = per_archetype[key] if ok else (None, None, None)
+            columns["secondary_emotions"].append(intern_tuple(secondary[:count]) if ok else None)
+            columns["psychological_triggers"].append(triggers)
+            columns["content_tone"].append(tone)
+        if columnar:
+            return columns
+
+        profiles = {}
+        results = []
+        for i, key in enumerate(keys):
+            if not valid[i]:
+                results.append(None)
+                continue
+            intensity = float(columns["intensity"][i])
+            profile_key = (columns["primary_emotion"][i], intensity)
+            if profile_key not in profiles:
+                profiles[profile_key] = EmotionalProfile(
+                    primary_emotion=columns["primary_emotion"][i],
+                    intensity=intensity,
+                    secondary_emotions=columns["secondary_emotions"][i],
+                    psychological_triggers=columns["psychological_triggers"][i],
+                    content_tone=columns["content_tone"][i]
+                )
+            results.append(profiles[profile_key])
+        return results
 
     def calculate_archetype_alignment(self, brand_values: dict) -> Dict[str, float]:
-        alignment_scores = {}
-        for archetype, triggers in self.trigger_mappings.items():
-            matching_keywords = [
-                keyword for keyword in brand_values.get('keywords', []) if keyword in triggers
-            ]
-            alignment_scores[archetype] = len(matching_keywords) / len(triggers)
-        return alignment_scores
-
-    def _get_content_tone(self, archetype: str, brand_values: dict) -> Dict[str, float]:
+        counts = self.alignment_scorer.count_terms([brand_values.get('keywords', [])])
+        return self.alignment_scorer.to_dicts(self.alignment_scorer.score(counts))[0]
+
+    def _get_content_tone(self, tables: ArchetypeTables, brand_values: dict) -> Dict[str, float]:
         """Get content tone mapping based on archetype and brand values"""
-        base_tone = self.tone_mappings.get(archetype.lower(), {})
         brand_tone = brand_values.get('tone', {})
 
         # Combine and adjust tone weights based on brand values
-        combined_tone = base_tone.copy()
+        combined_tone = dict(tables.tone)
         for tone, weight in brand_tone.items():
             if tone in combined_tone:
                 combined_tone[tone] = (combined_tone[tone] + float(weight)) / 2
 
         return combined_tone
 
-    def _get_secondary_emotions(self, archetype: str, intensity: float) -> List[str]:
+    def _get_secondary_emotions(self, tables: ArchetypeTables, intensity: float) -> Tuple[str, ...]:
         """Get secondary emotions based on archetype and intensity"""
-        emotion_sets = {
-            'autonomous': ['confident', 'determined', 'focused', 'ambitious'],
-            'impulsive': ['excited', 'passionate', 'energetic', 'enthusiastic'],
-            'isolative': ['peaceful', 'content', 'mindful', 'balanced'],
-            'avoidant': ['cautious', 'careful', 'measured', 'reserved']
-        }
-
-        base_emotions = emotion_sets.get(archetype.lower(), [])
+        base_emotions = tables.secondary_emotions
         # Return more secondary emotions for higher intensity
-        return base_emotions[:max(2, int(intensity * len(base_emotions)))]
+        return intern_tuple(base_emotions[:max(2, int(intensity * len(base_emotions)))])
 
     def optimize_content(self, content: str, emotional_profile: EmotionalProfile) -> str:
         """Optimize content based on emotional profile"""
+        return self.optimize_contents([content], emotional_profile)[0]
+
+    def optimize_contents(self, contents: Sequence[str], emotional_profile: EmotionalProfile) -> List[str]:
+        """Optimize many documents for one profile; tone is scored in one batch and trigger insertions are prepared once."""
         try:
             # Apply tone adjustments
-            optimized_content = self._adjust_tone(content, emotional_profile.content_tone)
+            adjusted = self._adjust_tones(contents, emotional_profile.content_tone)
+        except Exception as e:
+            logging.error(f"Error in tone adjustment: {e}")
+            adjusted = list(contents)
 
-            # Insert psychological triggers
-            optimized_content = self._insert_triggers(
-                optimized_content, 
-                emotional_profile.psychological_triggers
-            )
+        insertions = _trigger_insertions(tuple(emotional_profile.psychological_triggers))
+        optimized = []
+        for content, optimized_content in zip(contents, adjusted):
+            try:
+                # Insert psychological triggers
+                optimized.append(self._append_triggers(optimized_content, *insertions))
+            except Exception as e:
+                logging.error(f"Error in content optimization: {e}")
+                optimized.append(content)
+        return optimized
 
-            return optimized_content
-        except Exception as e:
-            logging.error(f"Error in content optimization: {e}")
-            return content
+    def score_tone(self, contents: Sequence[str], tone_mapping: Mapping[str, float]) -> List[float]:
+        """
+        Alignment (0-1) of each content's detected tone with a target tone mapping.
+
+        Tone detection goes through the shared tone batcher, so concurrent
+        callers are scored together by the local tone model when one is
+        installed, and by cue words otherwise.
+        """
+        top_weight = max(tone_mapping.values(), default=0.0)
+        if not contents or top_weight <= 0:
+            return [0.0] * len(contents)
+        weights = {tone: weight / top_weight for tone, weight in tone_mapping.items()}
+        return [
+            sum(weight * scores.get(tone, 0.0) for tone, weight in weights.items())
+            for scores in get_tone_batcher().score(contents)
+        ]
 
     def _adjust_tone(self, content: str, tone_mapping: Dict[str, float]) -> str:
-        """Adjust content tone dynamically using NLP (placeholder logic)."""
-        # Example: Implement real NLP tone adjustments here
-        return content
+        """Adjust one document's tone; see ``_adjust_tones``."""
+        return self._adjust_tones([content], tone_mapping)[0]
+
+    def _adjust_tones(self, contents: Sequence[str], tone_mapping: Mapping[str, float]) -> List[str]:
+        """Close each document that misses its target tone with a line in the dominant target tone."""
+        phrase = TONE_PHRASES.get(max(tone_mapping, key=tone_mapping.get)) if tone_mapping else None
+        texts = [content for content in contents if content]
+        if phrase is None or not texts:
+            return list(contents)
+
+        alignment = iter(self.score_tone(texts, tone_mapping))
+        return [
+            f"{content} {phrase}" if content and next(alignment) < TONE_MIN_ALIGNMENT else content
+            for content in contents
+        ]
 
-    def _insert_triggers(self, content: str, triggers: List[str]) -> str:
-        """Insert psychological triggers into high-impact positions."""
+    def _insert_triggers(self, content: str, triggers: Sequence[str]) -> str:
+        """Append each trigger that the content does not already mention."""
+        return self._append_triggers(content, *_trigger_insertions(tuple(triggers)))
+
+    def _append_triggers(self, content: str, insertions: Tuple[Tuple[str, str], ...], longest: int) -> str:
+        """
+        Each trigger is looked up once in the original content; a trigger can
+        otherwise only appear in the text appended so far (or straddle its
+        start), so only that short tail is re-checked. The result is built
+        with a single join instead of one copy per appended trigger.
+        """
         try:
-            for trigger in triggers:
-                if trigger not in content:
-                    content += f" {trigger.capitalize()}!"
-            return content
+            tail = content[max(0, len(content) - longest + 1):]
+
+            appended = []
+            for trigger, insertion in insertions:
+                if trigger in content or (appended and trigger in tail + "".join(appended)):
+                    continue
+                appended.append(insertion)
+            return content + "".join(appended) if appended else content
         except Exception as e:
             logging.error(f"Error in inserting triggers: {e}")
             return content
+
+
+@lru_cache(maxsize=1024)
+def _trigger_insertions(triggers: Tuple[str, ...]) -> Tuple[Tuple[Tuple[str, str], ...], int]:
+    """(trigger, appended text) pairs and the longest trigger length, built once per trigger tuple."""
+    insertions = tuple((trigger, f" {trigger.capitalize()}!") for trigger in triggers)
+    return insertions, max((len(trigger) for trigger in triggers), default=0)
+
+
+_emotion_engine: Optional[EmotionEngine] = None
+_emotion_engine_lock = threading.Lock()
+
+
+def get_emotion_engine() -> EmotionEngine:
+    """Return the process-wide shared engine, building its tables on first use."""
+    global _emotion_engine
+    if _emotion_engine is None:
+        with _emotion_engine_lock:
+            if _emotion_engine is None:
+                _emotion_engine = EmotionEngine()
+    return _emotion_engine
@@ -7,6 +7,7 @@ from auth import is_authenticated
 from auth_pages import render_auth_pages  # Import from correct module
 
 from components.recommendation_executor import render_recommendation_executor
+from components.chat_interface import render_chat_interface, render_chat_history
 
 def main():
     """Main function for the AI Marketing Assistant."""
@@ -28,9 +29,11 @@ def main():
         "SEO Analyzer",
         "Data Input",
         "Archetype Alignment",
-        "Marketing Recommendations"
+        "Marketing Recommendations",
+        "Chat",
+        "Chats History"
     ]
-    choice = st.sidebar.radio("Navigation", options)
+    choice = st.sidebar.radio("Navigation", options, key="navigation")
 
     # Route based on user selection
     if choice == "SEO Analyzer":
@@ -43,6 +46,10 @@ def main():
         render_archetype_alignment()
     elif choice == "Marketing Recommendations":
         render_marketing_recommendations()
+    elif choice == "Chat":
+        render_chat_interface()
+    elif choice == "Chats History":
+        render_chat_history(on_open=lambda: st.session_state.update(navigation="Chat"))
 
 if __name__ == "__main__":
     main()
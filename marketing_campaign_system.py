@@ -1,10 +1,10 @@
 from dataclasses import dataclass
 from datetime import datetime
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 import asyncio
-from emotion_engine import EmotionEngine, EmotionalProfile
+from emotion_engine import EmotionalProfile, get_emotion_engine
 
-@dataclass
+@dataclass(slots=True)
 class MarketingGoal:
     name: str
     target_metrics: Dict[str, float]
@@ -12,7 +12,7 @@ class MarketingGoal:
     deadline: datetime = None
     status: str = "pending"
 
-@dataclass
+@dataclass(slots=True)
 class BuyerPersona:
     name: str
     demographics: Dict[str, str]
@@ -22,22 +22,23 @@ class BuyerPersona:
     archetype: str
     emotional_profile: Optional[EmotionalProfile] = None
 
-@dataclass
+@dataclass(slots=True)
 class ContentPiece:
     title: str
     content_type: str
     target_persona: str
     emotional_tone: str
-    keywords: List[str]
+    keywords: Tuple[str, ...]
     content_body: str
     created_at: datetime
-    emotional_profile: Optional[Dict] = None
+    # Shared with the persona by reference, never copied per piece
+    emotional_profile: Optional[EmotionalProfile] = None
     performance_metrics: Optional[Dict[str, float]] = None
     engagement_data: Optional[Dict[str, Any]] = None
 
 class MarketingCampaignSystem:
     def __init__(self):
-        self.emotion_engine = EmotionEngine()
+        self.emotion_engine = get_emotion_engine()
         self.goals: List[MarketingGoal] = []
         self.buyer_personas: List[BuyerPersona] = []
         self.content_pieces: List[ContentPiece] = []
@@ -59,15 +60,13 @@ class MarketingCampaignSystem:
                 'emotional_insights': {}
             }
 
-            # Process each persona
-            for persona in personas:
-                # Analyze emotional context
-                emotional_profile = self.emotion_engine.analyze_emotional_context(
-                    archetype=persona.archetype,
-                    brand_values=brand_values,
-                    audience_data={'demographics': persona.demographics}
-                )
-                
+            # Analyze the emotional context of all personas in one batch
+            emotional_profiles = self.emotion_engine.analyze_emotional_context_batch(
+                archetypes=[persona.archetype for persona in personas],
+                brand_values=brand_values
+            )
+
+            for persona, emotional_profile in zip(personas, emotional_profiles):
                 if emotional_profile:
                     persona.emotional_profile = emotional_profile
                     campaign_data['emotional_insights'][persona.name] = {
@@ -128,14 +127,10 @@ class MarketingCampaignSystem:
                 content_type=content_type,
                 target_persona=persona.name,
                 emotional_tone=list(emotional_profile.content_tone.keys())[0],
-                keywords=[],  # To be filled by content generation
+                keywords=(),  # To be filled by content generation
                 content_body="",  # To be filled by content generation
                 created_at=datetime.utcnow(),
-                emotional_profile={
-                    'primary_emotion': emotional_profile.primary_emotion,
-                    'intensity': emotional_profile.intensity,
-                    'triggers': emotional_profile.psychological_triggers
-                }
+                emotional_profile=emotional_profile
             )
 
             return content_piece
@@ -194,9 +189,9 @@ class MarketingCampaignSystem:
         resonance_scores = {}
         for piece in self.content_pieces:
             if piece.emotional_profile and piece.performance_metrics:
-                emotion = piece.emotional_profile['primary_emotion']
+                emotion = piece.emotional_profile.primary_emotion
                 score = piece.performance_metrics.get('engagement_rate', 0) * \
-                       piece.emotional_profile.get('intensity', 1.0)
+                       piece.emotional_profile.intensity
                 resonance_scores[emotion] = resonance_scores.get(emotion, 0) + score
         return resonance_scores
 
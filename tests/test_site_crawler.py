@@ -0,0 +1,101 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from components.site_crawler import crawl_site
+from utils.html_extractor import extract_page
+from utils.http_fetcher import fetch_url
+
+
+def page(*links):
+    anchors = "".join(f'<a href="{link}">{link}</a>' for link in links)
+    return f"<html><head><title>t</title></head><body><h1>Page</h1>{anchors}</body></html>"
+
+
+SITE = {
+    "/": page("/a", "/b#section", "/logo.png", "http://example.invalid/elsewhere"),
+    "/a": page("/c"),
+    "/b": page("/"),
+    "/c": page(),
+    "/d": page(),
+    "/e": page(),
+    "/sitemap.xml": (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+        "<url><loc>{base}/d</loc></url><url><loc>{base}/e</loc></url>"
+        "</urlset>"
+    )
+}
+
+
+@pytest.fixture
+def site():
+    """Serve SITE from a local HTTP server; yields (base_url, list of requested paths)."""
+    requested = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            requested.append(self.path)
+            body = SITE.get(self.path)
+            if body is None:
+                self.send_error(404)
+                return
+            content_type = "application/xml" if self.path.endswith(".xml") else "text/html"
+            data = body.format(base=base_url).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield base_url, requested
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def analyze_page(url):
+    response = fetch_url(url, timeout=5)
+    extract = extract_page(response.text, base_url=response.url)
+    return {"url": url, "links": extract["links"], "archetype_scores": {}}
+
+
+def crawled_paths(result, base_url):
+    return [page["url"][len(base_url):] or "/" for page in result["pages"]]
+
+
+def test_follows_same_site_links_and_sitemap(site):
+    base_url, requested = site
+    result = crawl_site(base_url + "/", analyze_page, max_pages=50)
+
+    assert crawled_paths(result, base_url)[0] == "/"
+    assert sorted(crawled_paths(result, base_url)) == ["/", "/a", "/b", "/c", "/d", "/e"]
+    assert result["errors"] == []
+    # Images and off-site links are never fetched, and every page is fetched once
+    assert "/logo.png" not in requested
+    assert sorted(path for path in requested if path != "/sitemap.xml") == ["/", "/a", "/b", "/c", "/d", "/e"]
+
+
+def test_without_sitemap_only_links_are_followed(site):
+    base_url, requested = site
+    result = crawl_site(base_url + "/", analyze_page, max_pages=50, use_sitemap=False)
+
+    assert sorted(crawled_paths(result, base_url)) == ["/", "/a", "/b", "/c"]
+    assert "/sitemap.xml" not in requested
+
+
+def test_page_budget_caps_fetches(site):
+    base_url, requested = site
+    result = crawl_site(base_url + "/", analyze_page, max_pages=3)
+
+    assert result["pages_crawled"] == 3
+    assert len([path for path in requested if path != "/sitemap.xml"]) == 3
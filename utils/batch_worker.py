@@ -0,0 +1,71 @@
+import time
+import queue
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class BatchWorker:
+    """
+    Bounded queue drained in batches by one lazily started daemon thread.
+
+    The worker waits up to ``idle_timeout`` seconds (None waits forever) for a
+    first item, gathers more until ``batch_size`` items or ``max_wait``
+    seconds, and hands the batch to ``_process``. Once ``_closed`` is set it
+    exits as soon as the queue is empty. Subclasses implement ``_process``
+    and count events with ``_count`` under the names given in ``stat_names``.
+    """
+
+    def __init__(self, name: str, max_size: int, batch_size: int, max_wait: float,
+                 idle_timeout: Optional[float] = None, stat_names: tuple = ()):
+        self.name = name
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.idle_timeout = idle_timeout
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        self._stats = dict.fromkeys(stat_names, 0)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats, queued=self._queue.qsize())
+
+    def _count(self, key: str, amount: int = 1):
+        with self._lock:
+            self._stats[key] += amount
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            if batch:
+                self._process(batch)
+            elif self._closed:
+                return
+
+    def _collect(self) -> List[Any]:
+        """Wait for a first item, then gather more until the batch is full or max_wait has passed."""
+        try:
+            batch = [self._queue.get(timeout=self.idle_timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _process(self, batch: List[Any]):
+        raise NotImplementedError
@@ -0,0 +1,227 @@
+import os
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse, urljoin, urldefrag
+
+try:
+    from lxml import etree
+except ImportError:  # lxml is optional; fall back to the stdlib tokenizer
+    etree = None
+
+# Parser backend: "auto" uses lxml when installed, otherwise "html.parser"
+HTML_PARSER_BACKEND = os.environ.get("HTML_PARSER_BACKEND", "auto")
+
+HEADING_TAGS = {"h1", "h2", "h3", "h4", "h5", "h6"}
+# Elements whose text is never visible (BeautifulSoup's stripped_strings skips these too)
+HIDDEN_TAGS = {"script", "style", "template"}
+
+
+class PageExtractor:
+    """
+    Parser target that collects title, metas, headings, visible text and links.
+
+    It receives start/end/data events from either lxml's target parser or the
+    stdlib tokenizer, so a page is extracted in a single pass without building
+    a document tree.
+    """
+
+    def __init__(self, base_url: Optional[str] = None, max_text_chars: Optional[int] = None,
+                 alpha_only: bool = False, headings: bool = True):
+        self.base_url = base_url
+        self.max_text_chars = max_text_chars
+        self.alpha_only = alpha_only
+        self.collect_headings = headings
+
+        self.title: Optional[str] = None
+        self.meta_description = ""
+        self.meta_keywords = ""
+        self.headings: List[str] = []
+        self.strings: List[str] = []
+        self.links: List[str] = []
+
+        self._text_length = 0
+        self._buffer: List[str] = []
+        self._hidden_depth = 0
+        self._heading_depth = 0
+        self._heading_parts: List[str] = []
+        self._in_title = False
+        self.head_complete = False
+
+    @property
+    def text_full(self) -> bool:
+        return self.max_text_chars is not None and self._text_length >= self.max_text_chars
+
+    @property
+    def satisfied(self) -> bool:
+        """True once head metadata and the text budget are captured and neither links nor headings are wanted."""
+        return self.head_complete and self.text_full and self.base_url is None and not self.collect_headings
+
+    def start(self, tag: str, attrs: Dict[str, Optional[str]]):
+        self._flush()
+        tag = tag.lower()
+        if tag == "body":
+            self.head_complete = True
+        if tag in HIDDEN_TAGS:
+            self._hidden_depth += 1
+        elif tag in HEADING_TAGS and self.collect_headings:
+            self._heading_depth += 1
+        elif tag == "title" and self.title is None:
+            self._in_title = True
+        elif tag == "meta":
+            self._meta(attrs)
+        elif tag == "a" and self.base_url is not None and attrs.get("href"):
+            link, _ = urldefrag(urljoin(self.base_url, attrs["href"].strip()))
+            if urlparse(link).scheme in ("http", "https"):
+                self.links.append(link)
+
+    def end(self, tag: str):
+        self._flush()
+        tag = tag.lower()
+        if tag == "head":
+            self.head_complete = True
+        if tag in HIDDEN_TAGS and self._hidden_depth:
+            self._hidden_depth -= 1
+        elif tag in HEADING_TAGS and self._heading_depth:
+            self._heading_depth -= 1
+            if not self._heading_depth:
+                heading = "".join(self._heading_parts)
+                if heading and any(c.isalpha() for c in heading):
+                    self.headings.append(heading)
+                self._heading_parts = []
+        elif tag == "title" and self._in_title:
+            self._in_title = False
+            if self.title is None:
+                self.title = ""
+
+    def data(self, text: str):
+        if not self._hidden_depth:
+            self._buffer.append(text)
+
+    def comment(self, text: str):
+        pass
+
+    def close(self) -> Dict:
+        self._flush()
+        visible_text = " ".join(self.strings)
+        if self.max_text_chars is not None:
+            visible_text = visible_text[:self.max_text_chars]
+        return {
+            "title": self.title or "",
+            "meta_description": self.meta_description,
+            "meta_keywords": self.meta_keywords,
+            "headings": self.headings,
+            "visible_text": visible_text,
+            "links": self.links
+        }
+
+    def _meta(self, attrs: Dict[str, Optional[str]]):
+        name = (attrs.get("name") or "").lower()
+        content = attrs.get("content") or ""
+        if name == "description" and not self.meta_description:
+            self.meta_description = content
+        elif "keywords" in name and not self.meta_keywords:
+            self.meta_keywords = content
+
+    def _flush(self):
+        """Turn buffered character data into one stripped string, like a text node."""
+        if not self._buffer:
+            return
+        text = "".join(self._buffer).strip()
+        self._buffer = []
+        if not text:
+            return
+        if self._in_title and self.title is None:
+            self.title = text
+        if self._heading_depth:
+            self._heading_parts.append(text)
+        if self.text_full or (self.alpha_only and not any(c.isalpha() for c in text)):
+            return
+        self.strings.append(text)
+        self._text_length += len(text) + 1
+
+
+class _StdlibTokenizer(HTMLParser):
+    """Adapter that forwards stdlib HTMLParser callbacks to a PageExtractor."""
+
+    def __init__(self, target: PageExtractor):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def resolve_backend(backend: Optional[str] = None) -> str:
+    """Pick the parser backend, preferring lxml for 'auto' when it is installed."""
+    backend = backend or HTML_PARSER_BACKEND
+    if backend == "auto":
+        return "lxml" if etree is not None else "html.parser"
+    if backend == "lxml" and etree is None:
+        raise ImportError("lxml is not installed")
+    return backend
+
+
+class IncrementalExtractor:
+    """Feed HTML in chunks through the chosen backend and collect a page extract."""
+
+    def __init__(self, base_url: Optional[str] = None, max_text_chars: Optional[int] = None,
+                 alpha_only: bool = False, backend: Optional[str] = None, headings: bool = True):
+        self.target = PageExtractor(base_url, max_text_chars, alpha_only, headings)
+        self.backend = resolve_backend(backend)
+        if self.backend == "lxml":
+            self._parser = etree.HTMLParser(target=self.target)
+        else:
+            self._parser = _StdlibTokenizer(self.target)
+
+    @property
+    def satisfied(self) -> bool:
+        return self.target.satisfied
+
+    def feed(self, chunk: str):
+        self._parser.feed(chunk)
+
+    def close(self) -> Dict:
+        if self.backend == "lxml":
+            try:
+                return self._parser.close()
+            except etree.XMLSyntaxError:
+                # Empty or unparseable documents still yield whatever was collected
+                return self.target.close()
+        self._parser.close()
+        return self.target.close()
+
+
+def extract_page(html: str, base_url: Optional[str] = None, max_text_chars: Optional[int] = None,
+                 alpha_only: bool = False, backend: Optional[str] = None, headings: bool = True) -> Dict:
+    """Extract title, metas, headings, visible text and links from HTML in one pass."""
+    extractor = IncrementalExtractor(base_url, max_text_chars, alpha_only, backend, headings)
+    extractor.feed(html)
+    return extractor.close()
+
+
+def extract_stream(chunks: Iterable[str], base_url: Optional[str] = None,
+                   max_text_chars: Optional[int] = None, alpha_only: bool = False,
+                   backend: Optional[str] = None, headings: bool = True) -> Dict:
+    """
+    Extract a page from an iterable of HTML chunks, stopping once satisfied.
+
+    Headings can appear anywhere in a page, so only an extraction with
+    ``headings=False`` (and no base_url) stops before the chunks run out.
+    Chunks are not kept once parsed.
+    """
+    extractor = IncrementalExtractor(base_url, max_text_chars, alpha_only, backend, headings)
+    for chunk in chunks:
+        extractor.feed(chunk)
+        if extractor.satisfied:
+            break
+    return extractor.close()
@@ -0,0 +1,116 @@
+import os
+import codecs
+import threading
+from typing import Dict, Iterator, Optional
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Fetcher configuration (overridable through the environment)
+HTTP_POOL_CONNECTIONS = int(os.environ.get("HTTP_POOL_CONNECTIONS", 20))
+HTTP_POOL_MAXSIZE = int(os.environ.get("HTTP_POOL_MAXSIZE", 10))
+HTTP_MAX_RETRIES = int(os.environ.get("HTTP_MAX_RETRIES", 3))
+HTTP_BACKOFF_FACTOR = float(os.environ.get("HTTP_BACKOFF_FACTOR", 0.5))
+HTTP_TIMEOUT = float(os.environ.get("HTTP_TIMEOUT", 10))
+HTTP_MAX_PAGE_BYTES = int(os.environ.get("HTTP_MAX_PAGE_BYTES", 2 * 1024 * 1024))
+HTTP_CHUNK_SIZE = 16 * 1024
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+def _accept_encoding() -> str:
+    """Advertise brotli only when a decoder is installed for urllib3 to use."""
+    try:
+        import brotli  # noqa: F401
+        return "gzip, deflate, br"
+    except ImportError:
+        try:
+            import brotlicffi  # noqa: F401
+            return "gzip, deflate, br"
+        except ImportError:
+            return "gzip, deflate"
+
+
+def create_session(pool_connections: int = HTTP_POOL_CONNECTIONS,
+                   pool_maxsize: int = HTTP_POOL_MAXSIZE,
+                   max_retries: int = HTTP_MAX_RETRIES,
+                   backoff_factor: float = HTTP_BACKOFF_FACTOR) -> requests.Session:
+    """Create a session with per-host connection pooling and retry with backoff."""
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset({"GET", "HEAD"}),
+        respect_retry_after_header=True
+    )
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=retry
+    )
+
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    session.headers.update(DEFAULT_HEADERS)
+    session.headers["Accept-Encoding"] = _accept_encoding()
+    return session
+
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide shared session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+
+def fetch_url(url: str, headers: Optional[Dict[str, str]] = None,
+              timeout: float = HTTP_TIMEOUT, **kwargs) -> requests.Response:
+    """GET a URL through the shared session and raise for HTTP errors."""
+    response = get_session().get(url, headers=headers, timeout=timeout, **kwargs)
+    try:
+        response.raise_for_status()
+    except requests.HTTPError:
+        response.close()
+        raise
+    return response
+
+
+def iter_text(response: requests.Response, max_bytes: Optional[int] = HTTP_MAX_PAGE_BYTES,
+              chunk_size: int = HTTP_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Yield decoded text chunks from a streamed response, stopping after max_bytes.
+
+    The response is closed when the download finishes, hits the cap, or the
+    caller stops iterating early.
+    """
+    encoding = "utf-8"
+    if "charset" in response.headers.get("Content-Type", "").lower() and response.encoding:
+        encoding = response.encoding
+    try:
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    except LookupError:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    received = 0
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if max_bytes is not None and received + len(chunk) >= max_bytes:
+                yield decoder.decode(chunk[:max_bytes - received], final=True)
+                return
+            received += len(chunk)
+            text = decoder.decode(chunk)
+            if text:
+                yield text
+        tail = decoder.decode(b"", final=True)
+        if tail:
+            yield tail
+    finally:
+        response.close()
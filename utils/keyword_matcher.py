@@ -0,0 +1,70 @@
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+# Boundary modes: whole \w words, whitespace-delimited tokens, or plain substrings
+BOUNDARIES = {
+    "word": (r"(?<!\w)", r"(?!\w)"),
+    "token": (r"(?<!\S)", r"(?!\S)"),
+    None: ("", "")
+}
+
+
+class KeywordMatcher:
+    """
+    Single compiled alternation over a keyword set.
+
+    Finds every non-overlapping keyword occurrence, with its position, in one
+    left-to-right pass; at each position the longest keyword wins.
+    """
+
+    def __init__(self, keywords: Iterable[str], boundary: Optional[str] = "word",
+                 ignore_case: bool = False):
+        self.ignore_case = ignore_case
+        self.keywords = frozenset(k.lower() if ignore_case else k for k in keywords if k)
+        self.matches_everything = any(not k for k in keywords)
+
+        prefix, suffix = BOUNDARIES[boundary]
+        if self.keywords:
+            alternation = "|".join(
+                re.escape(k) for k in sorted(self.keywords, key=len, reverse=True)
+            )
+            pattern = f"{prefix}(?:{alternation}){suffix}"
+        else:
+            pattern = r"(?!)"
+        self.pattern = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+
+    def finditer(self, text: str) -> Iterator[Tuple[str, int, int]]:
+        """Yield (keyword, start, end) for each hit; keyword is lower-cased when ignore_case."""
+        for match in self.pattern.finditer(text):
+            keyword = match.group(0)
+            yield (keyword.lower() if self.ignore_case else keyword), match.start(), match.end()
+
+    def findall(self, text: str) -> List[str]:
+        return [keyword for keyword, _, _ in self.finditer(text)]
+
+    def search(self, text: str) -> bool:
+        return self.matches_everything or self.pattern.search(text) is not None
+
+
+@lru_cache(maxsize=256)
+def compile_matcher(keywords: Tuple[str, ...], boundary: Optional[str] = "word",
+                    ignore_case: bool = False) -> KeywordMatcher:
+    """Build (or reuse) a matcher for a keyword tuple; matchers are cached per keyword set."""
+    return KeywordMatcher(keywords, boundary=boundary, ignore_case=ignore_case)
+
+
+def hit_segments(text: str, separator: str, matcher: KeywordMatcher) -> List[int]:
+    """Return the indexes of the separator-delimited segments of text that contain a hit."""
+    if matcher.matches_everything:
+        return list(range(text.count(separator) + 1))
+
+    segments = []
+    segment = 0
+    position = 0
+    for _, start, _ in matcher.finditer(text):
+        segment += text.count(separator, position, start)
+        position = start
+        if not segments or segments[-1] != segment:
+            segments.append(segment)
+    return segments
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, List, Optional
+from utils.sqlite_store import SQLiteStore
+from utils.ttl_cache import TTLCache
+
+# Cache configuration (overridable through the environment)
+LLM_CACHE_BACKEND = os.environ.get("LLM_CACHE_BACKEND", "memory")
+LLM_CACHE_TTL_SECONDS = int(os.environ.get("LLM_CACHE_TTL_SECONDS", 7 * 24 * 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1000))
+LLM_CACHE_PATH = os.environ.get("LLM_CACHE_PATH", os.path.join(".cache", "llm_cache.sqlite3"))
+
+
+def make_cache_key(model: str, messages: List[Dict], temperature: Optional[float] = None,
+                   max_tokens: Optional[int] = None) -> str:
+    """Build a content-addressed key for a chat completion request."""
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens
+        },
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class SQLiteCacheBackend(SQLiteStore):
+    """On-disk backend that evicts the least recently used entries beyond max_entries."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, max_entries: int = LLM_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.evictions = 0
+        super().__init__(path)
+
+    def _create_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                last_access REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_last_access ON llm_cache (last_access)")
+
+    def get(self, key: str) -> Optional[str]:
+        now = time.time()
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self.conn.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+            return row[0]
+
+    def set(self, key: str, value: str, ttl: int):
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, expires_at, last_access) VALUES (?, ?, ?, ?)",
+                (key, value, now + ttl, now)
+            )
+            self.conn.execute("DELETE FROM llm_cache WHERE expires_at < ?", (now,))
+            overflow = self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM llm_cache WHERE key IN "
+                    "(SELECT key FROM llm_cache ORDER BY last_access ASC LIMIT ?)",
+                    (overflow,)
+                )
+                self.evictions += overflow
+
+    def delete(self, key: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM llm_cache")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+
+class LLMCache:
+    """Response cache in front of a pluggable backend, with hit/miss counters."""
+
+    def __init__(self, backend=None, ttl: int = LLM_CACHE_TTL_SECONDS):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        value = self.backend.get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: str):
+        if self.enabled and value is not None:
+            self.backend.set(key, value, self.ttl)
+
+    def delete(self, key: str):
+        if self.enabled:
+            self.backend.delete(key)
+
+    def clear(self):
+        if self.enabled:
+            self.backend.clear()
+
+    def stats(self) -> Dict:
+        """Return hit/miss counters and backend size."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": type(self.backend).__name__ if self.enabled else None,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": getattr(self.backend, "evictions", 0),
+                "entries": len(self.backend) if self.enabled else 0
+            }
+
+
+def create_backend(name: str = LLM_CACHE_BACKEND):
+    """Create a cache backend by name ('memory', 'sqlite' or 'none')."""
+    name = (name or "none").lower()
+    if name == "memory":
+        return TTLCache(max_entries=LLM_CACHE_MAX_ENTRIES)
+    if name == "sqlite":
+        return SQLiteCacheBackend()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown LLM cache backend: {name}")
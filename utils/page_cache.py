@@ -0,0 +1,132 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Optional
+from utils.sqlite_store import SQLiteStore
+
+# Page cache configuration (overridable through the environment)
+PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "1") != "0"
+PAGE_CACHE_PATH = os.environ.get("PAGE_CACHE_PATH", os.path.join(".cache", "page_cache.sqlite3"))
+PAGE_CACHE_MAX_ENTRIES = int(os.environ.get("PAGE_CACHE_MAX_ENTRIES", 5000))
+PAGE_CACHE_MAX_AGE_SECONDS = int(os.environ.get("PAGE_CACHE_MAX_AGE_SECONDS", 30 * 24 * 3600))
+
+# Response headers kept alongside the analysis for revalidation
+CACHED_HEADERS = ("ETag", "Last-Modified", "Content-Type")
+
+
+class PageCache(SQLiteStore):
+    """
+    On-disk store of fetched pages' validators and extracted analysis.
+
+    Page bodies are not kept: a 304 reuses the stored analysis and anything
+    else is parsed from the new response. Entries not revalidated within
+    ``max_age`` seconds are dropped, and beyond ``max_entries`` the least
+    recently validated ones are evicted.
+    """
+
+    def __init__(self, path: str = PAGE_CACHE_PATH, max_entries: int = PAGE_CACHE_MAX_ENTRIES,
+                 max_age: int = PAGE_CACHE_MAX_AGE_SECONDS):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        super().__init__(path)
+
+    def _create_schema(self, conn):
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(page_cache)")}
+        if "body" in columns:
+            # Caches written before bodies were dropped are simply rebuilt
+            conn.execute("DROP TABLE page_cache")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS page_cache (
+                url TEXT PRIMARY KEY,
+                headers TEXT NOT NULL,
+                analysis TEXT NOT NULL,
+                analysis_version INTEGER NOT NULL,
+                fetched_at REAL NOT NULL,
+                validated_at REAL NOT NULL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_page_cache_validated ON page_cache (validated_at)")
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Return the cached entry for a URL, or None (also when it has expired)."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT headers, analysis, analysis_version, fetched_at, validated_at "
+                "FROM page_cache WHERE url = ? AND validated_at >= ?",
+                (url, time.time() - self.max_age)
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "url": url,
+            "headers": json.loads(row[0]),
+            "analysis": json.loads(row[1]),
+            "analysis_version": row[2],
+            "fetched_at": row[3],
+            "validated_at": row[4]
+        }
+
+    def set(self, url: str, headers, analysis: Dict, analysis_version: int):
+        """Store a freshly downloaded page's validators and extracted analysis, then enforce the limits."""
+        kept_headers = {name: headers[name] for name in CACHED_HEADERS if headers.get(name)}
+        now = time.time()
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO page_cache "
+                "(url, headers, analysis, analysis_version, fetched_at, validated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    json.dumps(kept_headers),
+                    json.dumps(analysis, ensure_ascii=False),
+                    analysis_version,
+                    now,
+                    now
+                )
+            )
+            self.conn.execute("DELETE FROM page_cache WHERE validated_at < ?", (now - self.max_age,))
+            overflow = self.conn.execute("SELECT COUNT(*) FROM page_cache").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self.conn.execute(
+                    "DELETE FROM page_cache WHERE url IN "
+                    "(SELECT url FROM page_cache ORDER BY validated_at ASC LIMIT ?)",
+                    (overflow,)
+                )
+
+    def touch(self, url: str):
+        """Record a successful 304 revalidation."""
+        with self._lock, self.conn:
+            self.conn.execute("UPDATE page_cache SET validated_at = ? WHERE url = ?", (time.time(), url))
+
+    def clear(self):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM page_cache")
+
+
+def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+    """Build If-None-Match / If-Modified-Since request headers from a cached entry."""
+    if not entry:
+        return {}
+    headers = {}
+    if entry["headers"].get("ETag"):
+        headers["If-None-Match"] = entry["headers"]["ETag"]
+    if entry["headers"].get("Last-Modified"):
+        headers["If-Modified-Since"] = entry["headers"]["Last-Modified"]
+    return headers
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """Return the shared page cache, or None when PAGE_CACHE_ENABLED is off."""
+    global _page_cache
+    if not PAGE_CACHE_ENABLED:
+        return None
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache()
+    return _page_cache
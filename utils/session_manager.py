@@ -1,5 +1,7 @@
 import streamlit as st
-from typing import Optional, Any, Dict, List
+from types import MappingProxyType
+from typing import Optional, Any, Dict, List, Mapping
+from utils.session_store import MISSING, SessionStore, get_session_store
 
 def initialize_session_state():
     """Initialize session state variables if they don't exist"""
@@ -13,22 +15,147 @@ def initialize_session_state():
             'is_completed': False
         }
 
-def initialize_user_session(user_id: str):
-    """Initialize user-specific session state variables."""
-    prefix = f"user_{user_id}_"
-
-    # Brand values
-    if f'{prefix}brand_values' not in st.session_state:
-        st.session_state[f'{prefix}brand_values'] = {
+class UserNamespace:
+    """
+    All session values of one user, held in a single dict.
+
+    Clearing swaps in a fresh dict, and ``snapshot`` hands out a read-only view
+    that stays valid because the next write copies the (shallow) dict first.
+    Values are shared with snapshots, so replace them with ``set`` rather than
+    mutating them in place.
+
+    With a session store attached, writes go through to it and each key is
+    loaded from it the first time it is read, so a restarted process or
+    another replica only reads the keys a page actually uses. ``defaults``
+    fill in keys the store has never seen.
+    """
+
+    def __init__(self, user_id: str, store: Optional[SessionStore] = None,
+                 defaults: Optional[Dict[str, Any]] = None):
+        self.user_id = user_id
+        self.store = store
+        self.defaults: Dict[str, Any] = dict(defaults or {})
+        self._data: Dict[str, Any] = {}
+        self._absent = set()
+        self._shared = False
+
+    def __contains__(self, key: str) -> bool:
+        return self._lookup(key) is not MISSING
+
+    def get(self, key: str, default: Any = None) -> Any:
+        value = self._lookup(key)
+        return default if value is MISSING else value
+
+    def get_dict(self, key: str, default: Optional[Dict] = None) -> Dict:
+        value = self._lookup(key)
+        return value if isinstance(value, dict) else ({} if default is None else default)
+
+    def get_list(self, key: str, default: Optional[List] = None) -> List:
+        value = self._lookup(key)
+        return value if isinstance(value, list) else ([] if default is None else default)
+
+    def get_str(self, key: str, default: str = "") -> str:
+        value = self._lookup(key)
+        return value if isinstance(value, str) else default
+
+    def get_bool(self, key: str, default: bool = False) -> bool:
+        value = self._lookup(key)
+        return value if isinstance(value, bool) else default
+
+    def set(self, key: str, value: Any):
+        self._before_write()
+        self._data[key] = value
+        self._absent.discard(key)
+        if self.store is not None:
+            self.store.save(self.user_id, key, value)
+
+    def setdefault(self, key: str, value: Any) -> Any:
+        current = self._lookup(key)
+        if current is not MISSING:
+            return current
+        self.set(key, value)
+        return value
+
+    def update(self, values: Dict[str, Any]):
+        for key, value in values.items():
+            self.set(key, value)
+
+    def delete(self, key: str):
+        self.defaults.pop(key, None)
+        if key in self._data:
+            self._before_write()
+            del self._data[key]
+        self._absent.add(key)
+        if self.store is not None:
+            self.store.delete(self.user_id, key)
+
+    def add_defaults(self, values: Dict[str, Any]):
+        """Register fallbacks for keys that are neither loaded nor persisted yet."""
+        for key, value in values.items():
+            if key not in self._data:
+                self.defaults.setdefault(key, value)
+                self._absent.discard(key)
+
+    def clear(self, purge: bool = False):
+        """Drop the in-memory values; ``purge`` also deletes the persisted ones."""
+        self._data = {}
+        self._absent = set()
+        self._shared = False
+        if purge and self.store is not None:
+            self.store.clear(self.user_id)
+
+    def snapshot(self) -> Mapping[str, Any]:
+        """Read-only view of the values loaded so far, unaffected by later writes."""
+        self._shared = True
+        return MappingProxyType(self._data)
+
+    def _lookup(self, key: str) -> Any:
+        if key in self._data:
+            return self._data[key]
+        if key in self._absent:
+            return MISSING
+        value = self.store.load(self.user_id, key) if self.store is not None else MISSING
+        if value is MISSING:
+            value = self.defaults.pop(key, MISSING)
+        if value is MISSING:
+            self._absent.add(key)
+            return MISSING
+        self._before_write()
+        self._data[key] = value
+        return value
+
+    def _before_write(self):
+        if self._shared:
+            self._data = dict(self._data)
+            self._shared = False
+
+
+def _namespace_key(user_id) -> str:
+    return f"user_{user_id}"
+
+
+def get_user_namespace(user_id, create: bool = True) -> Optional[UserNamespace]:
+    """Return the namespace holding a user's session values, creating it if asked."""
+    key = _namespace_key(user_id)
+    namespace = st.session_state.get(key)
+    if namespace is None and create:
+        store = get_session_store() if user_id is not None else None
+        namespace = st.session_state[key] = UserNamespace(str(user_id), store)
+    return namespace
+
+
+def _user_defaults() -> Dict[str, Any]:
+    """Fresh default values for a newly initialized user session."""
+    return {
+        # Brand values
+        'brand_values': {
             'mission': '',
             'values': [],
             'virtues': [],
             'is_completed': False
-        }
-
-    # ICP data
-    if f'{prefix}icp_data' not in st.session_state:
-        st.session_state[f'{prefix}icp_data'] = {
+        },
+        # ICP data
+        'icp_data': {
             'knowledge_level': '',
             'current_question': 1,
             'demographics': {},
@@ -38,57 +165,56 @@ def initialize_user_session(user_id: str):
             'goals': [],
             'answers': {},
             'is_completed': False
-        }
-
-    # Webpage analysis
-    if f'{prefix}webpage_analysis' not in st.session_state:
-        st.session_state[f'{prefix}webpage_analysis'] = {
+        },
+        # Webpage analysis
+        'webpage_analysis': {
             'url': '',
             'analysis': {},
             'is_completed': False
-        }
-
-    # Archetype analysis
-    if f'{prefix}archetype_analysis' not in st.session_state:
-        st.session_state[f'{prefix}archetype_analysis'] = {
+        },
+        # Archetype analysis
+        'archetype_analysis': {
             'archetype_scores': {},
             'subscale_matches': [],
             'is_completed': False
-        }
+        },
+        # Navigation and UI state
+        'selected_option': 'content',
+        'show_icp_questionnaire': False,
+        'archetype_view': 'archetypes',
+        # Chat state
+        'chat_history': [],
+        'chat_has_older': False,
+        'current_chat_id': None
+    }
 
-    # Navigation and UI state
-    if f'{prefix}selected_option' not in st.session_state:
-        st.session_state[f'{prefix}selected_option'] = 'content'
-    if f'{prefix}show_icp_questionnaire' not in st.session_state:
-        st.session_state[f'{prefix}show_icp_questionnaire'] = False
-    if f'{prefix}archetype_view' not in st.session_state:
-        st.session_state[f'{prefix}archetype_view'] = 'archetypes'
 
-    # Chat state
-    if f'{prefix}chat_history' not in st.session_state:
-        st.session_state[f'{prefix}chat_history'] = []
-    if f'{prefix}current_chat_id' not in st.session_state:
-        st.session_state[f'{prefix}current_chat_id'] = None
+def initialize_user_session(user_id: str):
+    """Initialize user-specific session state variables."""
+    namespace = get_user_namespace(user_id)
+    namespace.add_defaults(_user_defaults())
 
 
 def get_user_state(user_id: str, key: str, default: Any = None) -> Any:
     """Get user-specific session state value."""
-    prefix = f"user_{user_id}_"
-    return st.session_state.get(f'{prefix}{key}', default)
+    return get_user_namespace(user_id).get(key, default)
 
 
 def set_user_state(user_id: str, key: str, value: Any):
     """Set user-specific session state value."""
-    prefix = f"user_{user_id}_"
-    st.session_state[f'{prefix}{key}'] = value
+    get_user_namespace(user_id).set(key, value)
 
 
-def clear_user_session(user_id: str):
-    """Clear all session state variables for a specific user."""
-    prefix = f"user_{user_id}_"
-    keys_to_remove = [key for key in st.session_state.keys() if key.startswith(prefix)]
-    for key in keys_to_remove:
+def clear_user_session(user_id: str, purge: bool = False):
+    """Clear all session state variables for a specific user; ``purge`` also drops persisted values."""
+    key = _namespace_key(user_id)
+    if key in st.session_state:
+        st.session_state[key].clear(purge)
         del st.session_state[key]
+    elif purge:
+        store = get_session_store()
+        if store is not None:
+            store.clear(str(user_id))
 
 
 def get_current_user_id() -> Optional[str]:
@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Optional, Tuple
+from utils.sqlite_store import SQLiteStore
+
+# Session store configuration (overridable through the environment)
+SESSION_BACKEND = os.environ.get("SESSION_BACKEND", "sqlite")
+SESSION_STORE_PATH = os.environ.get("SESSION_STORE_PATH", os.path.join(".cache", "session_store.sqlite3"))
+
+MISSING = object()
+
+
+def dumps(value: Any) -> str:
+    """Compact JSON encoding used for persisted session values."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+class SQLiteSessionBackend(SQLiteStore):
+    """Per-user, per-key session values in a local SQLite file."""
+
+    def __init__(self, path: str = SESSION_STORE_PATH):
+        super().__init__(path)
+
+    def _create_schema(self, conn):
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS user_session (
+                user_id TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (user_id, key)
+            )
+        """)
+
+    def load(self, user_id: str, key: str) -> Any:
+        """Return the stored value, or MISSING."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT value FROM user_session WHERE user_id = ? AND key = ?", (user_id, key)
+            ).fetchone()
+        return MISSING if row is None else json.loads(row[0])
+
+    def save(self, user_id: str, key: str, value: Any):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO user_session (user_id, key, value, updated_at) VALUES (?, ?, ?, ?)",
+                (user_id, key, dumps(value), time.time())
+            )
+
+    def delete(self, user_id: str, key: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM user_session WHERE user_id = ? AND key = ?", (user_id, key))
+
+    def clear(self, user_id: str):
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM user_session WHERE user_id = ?", (user_id,))
+
+
+class PostgresSessionBackend:
+    """Session values in the shared Postgres database (JSONB), visible to every replica."""
+
+    def __init__(self, pool=None):
+        from database import get_pool
+        self.pool = pool or get_pool()
+
+    def load(self, user_id: str, key: str) -> Any:
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("SELECT value FROM user_session WHERE user_id = %s AND key = %s", (user_id, key))
+            row = cur.fetchone()
+        return MISSING if row is None else row[0]
+
+    def save(self, user_id: str, key: str, value: Any):
+        from psycopg2.extras import Json
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO user_session (user_id, key, value, updated_at)
+                VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                ON CONFLICT (user_id, key) DO UPDATE
+                SET value = EXCLUDED.value, updated_at = EXCLUDED.updated_at
+                """,
+                (user_id, key, Json(value, dumps=dumps))
+            )
+
+    def delete(self, user_id: str, key: str):
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM user_session WHERE user_id = %s AND key = %s", (user_id, key))
+
+    def clear(self, user_id: str):
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            cur.execute("DELETE FROM user_session WHERE user_id = %s", (user_id,))
+
+
+class SessionStore:
+    """Write-through front for a session backend; backend failures are logged, never raised."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def load(self, user_id: str, key: str) -> Any:
+        try:
+            return self.backend.load(user_id, key)
+        except Exception as e:
+            logging.error(f"Error loading session value {key!r}: {e}")
+            return MISSING
+
+    def save(self, user_id: str, key: str, value: Any):
+        try:
+            self.backend.save(user_id, key, value)
+        except Exception as e:
+            logging.error(f"Error saving session value {key!r}: {e}")
+
+    def delete(self, user_id: str, key: str):
+        try:
+            self.backend.delete(user_id, key)
+        except Exception as e:
+            logging.error(f"Error deleting session value {key!r}: {e}")
+
+    def clear(self, user_id: str):
+        try:
+            self.backend.clear(user_id)
+        except Exception as e:
+            logging.error(f"Error clearing session values: {e}")
+
+
+def create_session_backend(name: str = SESSION_BACKEND):
+    """Create a session backend by name ('sqlite', 'postgres' or 'none')."""
+    name = (name or "none").lower()
+    if name == "sqlite":
+        return SQLiteSessionBackend()
+    if name == "postgres":
+        return PostgresSessionBackend()
+    if name == "none":
+        return None
+    raise ValueError(f"Unknown session backend: {name}")
+
+
+_session_store: Optional[SessionStore] = None
+_session_store_lock = threading.Lock()
+
+
+def get_session_store() -> Optional[SessionStore]:
+    """Return the shared session store, or None when SESSION_BACKEND is 'none'."""
+    global _session_store
+    if _session_store is None:
+        with _session_store_lock:
+            if _session_store is None:
+                backend = create_session_backend()
+                if backend is None:
+                    return None
+                _session_store = SessionStore(backend)
+    return _session_store
@@ -0,0 +1,27 @@
+import os
+import sqlite3
+import threading
+
+
+class SQLiteStore:
+    """
+    Base for stores kept in a local SQLite file and shared by every thread.
+
+    One connection is opened with check_same_thread=False and every use is
+    serialized by ``_lock``. Subclasses create their tables in
+    ``_create_schema``, which runs once, in a transaction, when the store opens.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self.conn:
+            self._create_schema(self.conn)
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        pass
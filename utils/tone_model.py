@@ -0,0 +1,199 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Sequence, Tuple
+from utils.batch_worker import BatchWorker
+from utils.keyword_matcher import compile_matcher
+
+# Tone model configuration (overridable through the environment)
+# Backend: "auto" picks transformers for a model directory and scikit-learn for a
+# joblib file at TONE_MODEL_PATH, and the lexical scorer when neither is present
+TONE_MODEL_BACKEND = os.environ.get("TONE_MODEL_BACKEND", "auto")
+TONE_MODEL_PATH = os.environ.get("TONE_MODEL_PATH", os.path.join(".cache", "tone_model"))
+TONE_MODEL_MAX_CHARS = int(os.environ.get("TONE_MODEL_MAX_CHARS", 2000))
+TONE_BATCH_SIZE = int(os.environ.get("TONE_BATCH_SIZE", 32))
+TONE_BATCH_MAX_WAIT = float(os.environ.get("TONE_BATCH_MAX_WAIT", 0.01))
+TONE_MAX_QUEUE = int(os.environ.get("TONE_MAX_QUEUE", 1024))
+TONE_REQUEST_TIMEOUT = float(os.environ.get("TONE_REQUEST_TIMEOUT", 10))
+
+ToneScores = Dict[str, float]
+
+# Cue words per tone label (the labels used in emotion_engine.TONE_MAPPINGS)
+TONE_LEXICON = {
+    'professional': ('expertise', 'solution', 'solutions', 'industry', 'quality', 'standard', 'service'),
+    'authoritative': ('proven', 'leading', 'expert', 'experts', 'guaranteed', 'trusted', 'research'),
+    'direct': ('get', 'start', 'do', 'now', 'simply', 'today', 'here'),
+    'analytical': ('data', 'results', 'measure', 'percent', 'analysis', 'compare', 'metrics'),
+    'energetic': ('boost', 'power', 'fast', 'go', 'unleash', 'amazing', 'ready'),
+    'persuasive': ('imagine', 'discover', 'because', 'you', 'best', 'free', 'why'),
+    'urgent': ('now', 'today', 'limited', 'hurry', 'last', 'ends', 'deadline'),
+    'exciting': ('new', 'exciting', 'incredible', 'wow', 'introducing', 'launch', 'thrilling'),
+    'calm': ('relax', 'easy', 'quiet', 'gentle', 'slow', 'breathe', 'peaceful'),
+    'reassuring': ('safe', 'guarantee', 'worry', 'support', 'care', 'protected', 'confidence'),
+    'authentic': ('honest', 'real', 'genuine', 'story', 'transparent', 'true', 'ourselves'),
+    'empathetic': ('understand', 'feel', 'know', 'together', 'struggle', 'hear', 'listen'),
+    'gentle': ('gently', 'soft', 'kind', 'comfortable', 'patient', 'easy', 'welcome'),
+    'supportive': ('help', 'support', 'guide', 'alongside', 'team', 'assist', 'here'),
+    'non-threatening': ('no', 'pressure', 'optional', 'whenever', 'choose', 'anytime', 'free'),
+    'encouraging': ('can', 'progress', 'step', 'achieve', 'believe', 'grow', 'succeed')
+}
+
+
+class LexicalToneScorer:
+    """Tone distribution from cue-word counts; needs no model and is always available."""
+
+    def __init__(self, lexicon: Dict[str, Tuple[str, ...]] = TONE_LEXICON):
+        self.labels = tuple(lexicon)
+        cue_tones: Dict[str, List[str]] = {}
+        for tone, cues in lexicon.items():
+            for cue in cues:
+                cue_tones.setdefault(cue.lower(), []).append(tone)
+        self.cue_tones = {cue: tuple(tones) for cue, tones in cue_tones.items()}
+        self.matcher = compile_matcher(tuple(sorted(self.cue_tones)), boundary="word", ignore_case=True)
+
+    def score(self, texts: Sequence[str]) -> List[ToneScores]:
+        results = []
+        for text in texts:
+            counts = dict.fromkeys(self.labels, 0.0)
+            for cue in self.matcher.findall(text):
+                for tone in self.cue_tones[cue]:
+                    counts[tone] += 1.0
+            total = sum(counts.values())
+            results.append({tone: count / total for tone, count in counts.items()} if total else counts)
+        return results
+
+
+class SklearnToneScorer:
+    """A fitted scikit-learn text pipeline (e.g. TF-IDF + logistic regression) saved with joblib."""
+
+    def __init__(self, path: str, max_chars: int = TONE_MODEL_MAX_CHARS):
+        import joblib
+        self.model = joblib.load(path)
+        self.labels = tuple(str(label).lower() for label in self.model.classes_)
+        self.max_chars = max_chars
+
+    def score(self, texts: Sequence[str]) -> List[ToneScores]:
+        probabilities = self.model.predict_proba([text[:self.max_chars] for text in texts])
+        return [dict(zip(self.labels, map(float, row))) for row in probabilities]
+
+
+class TransformersToneScorer:
+    """A locally stored transformers text-classification model, run on CPU."""
+
+    def __init__(self, path: str, max_chars: int = TONE_MODEL_MAX_CHARS):
+        from transformers import pipeline
+        self.pipeline = pipeline("text-classification", model=path, tokenizer=path, top_k=None, device=-1)
+        self.labels = tuple(label.lower() for label in self.pipeline.model.config.id2label.values())
+        self.max_chars = max_chars
+
+    def score(self, texts: Sequence[str]) -> List[ToneScores]:
+        outputs = self.pipeline([text[:self.max_chars] for text in texts],
+                                batch_size=len(texts), truncation=True)
+        return [{item["label"].lower(): float(item["score"]) for item in output} for output in outputs]
+
+
+def load_tone_scorer(backend: str = TONE_MODEL_BACKEND, path: str = TONE_MODEL_PATH):
+    """Load the configured tone model, falling back to the lexical scorer when it is missing or unusable."""
+    backend = (backend or "auto").lower()
+    if backend not in ("auto", "transformers", "sklearn", "lexical"):
+        raise ValueError(f"Unknown tone model backend: {backend}")
+
+    if backend == "auto":
+        backend = "transformers" if os.path.isdir(path) else "sklearn" if os.path.isfile(path) else "lexical"
+    try:
+        if backend == "transformers":
+            return TransformersToneScorer(path)
+        if backend == "sklearn":
+            return SklearnToneScorer(path)
+    except Exception as e:
+        logging.warning(f"Tone model at {path!r} unavailable ({backend}), using lexical scorer: {e}")
+    return LexicalToneScorer()
+
+
+class ToneBatcher(BatchWorker):
+    """
+    Micro-batches tone scoring requests from concurrent callers.
+
+    Each text is queued with a future; a worker thread takes the first waiting
+    text, gathers more for at most ``max_wait`` seconds or until ``batch_size``
+    and scores them with one model call. Texts that do not fit in the bounded
+    queue, time out, or hit a model error are scored with the lexical scorer
+    instead, so callers never block on an overloaded model.
+    """
+
+    def __init__(self, scorer, batch_size: int = TONE_BATCH_SIZE,
+                 max_wait: float = TONE_BATCH_MAX_WAIT, max_size: int = TONE_MAX_QUEUE,
+                 timeout: float = TONE_REQUEST_TIMEOUT):
+        super().__init__("tone-batcher", max_size, batch_size, max_wait,
+                         stat_names=("scored", "batches", "fallback", "rejected"))
+        self.scorer = scorer
+        self.fallback = scorer if isinstance(scorer, LexicalToneScorer) else LexicalToneScorer()
+        self.timeout = timeout
+
+    def score(self, texts: Sequence[str]) -> List[ToneScores]:
+        """Tone scores for each text, in order."""
+        if self.scorer is self.fallback:
+            # Cue-word scoring is cheap enough to run on the caller's thread
+            return self.fallback.score(texts)
+
+        self._ensure_worker()
+        futures: List[Optional[Future]] = []
+        for text in texts:
+            future = Future()
+            try:
+                self._queue.put_nowait((text, future))
+            except queue.Full:
+                self._count("rejected")
+                future = None
+            futures.append(future)
+
+        deadline = time.monotonic() + self.timeout
+        results: List[Optional[ToneScores]] = []
+        for future in futures:
+            result = None
+            if future is not None:
+                try:
+                    result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+                except Exception:
+                    future.cancel()
+            results.append(result)
+
+        missing = [index for index, result in enumerate(results) if result is None]
+        if missing:
+            self._count("fallback", len(missing))
+            for index, scores in zip(missing, self.fallback.score([texts[index] for index in missing])):
+                results[index] = scores
+        return results
+
+    def _process(self, batch: List[Tuple[str, Future]]):
+        # Callers that timed out have cancelled their futures; skip those texts
+        batch = [item for item in batch if item[1].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        try:
+            scores = self.scorer.score([text for text, _ in batch])
+        except Exception as e:
+            logging.error(f"Tone model failed on a batch of {len(batch)}: {e}")
+            scores = [None] * len(batch)
+        else:
+            self._count("batches")
+            self._count("scored", len(batch))
+        for (_, future), result in zip(batch, scores):
+            future.set_result(result)
+
+
+_tone_batcher: Optional[ToneBatcher] = None
+_tone_batcher_lock = threading.Lock()
+
+
+def get_tone_batcher() -> ToneBatcher:
+    """Return the process-wide tone batcher, loading the tone model on first use."""
+    global _tone_batcher
+    if _tone_batcher is None:
+        with _tone_batcher_lock:
+            if _tone_batcher is None:
+                _tone_batcher = ToneBatcher(load_tone_scorer())
+    return _tone_batcher
@@ -0,0 +1,129 @@
+import os
+import time
+import queue
+import logging
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from utils.batch_worker import BatchWorker
+
+# Write-behind configuration (overridable through the environment)
+WRITE_BEHIND_MAX_QUEUE = int(os.environ.get("WRITE_BEHIND_MAX_QUEUE", 10000))
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", 500))
+WRITE_BEHIND_FLUSH_INTERVAL = float(os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", 0.5))
+WRITE_BEHIND_MAX_RETRIES = int(os.environ.get("WRITE_BEHIND_MAX_RETRIES", 3))
+WRITE_BEHIND_BACKOFF = float(os.environ.get("WRITE_BEHIND_BACKOFF", 0.5))
+
+Handler = Callable[[List[Dict]], Any]
+
+# Errors a retry cannot fix: the records themselves are bad
+PERMANENT_ERRORS: Tuple[type, ...] = (KeyError, ValueError, TypeError)
+
+
+class WriteBehindQueue(BatchWorker):
+    """
+    Bounded queue of records written to storage by a background thread.
+
+    Records are grouped by kind and handed to that kind's handler in batches of
+    up to ``batch_size``, collected for at most ``flush_interval`` seconds. A
+    failing batch is retried with exponential backoff (unless the error is one
+    of ``permanent_errors``), then split in halves that are written once each,
+    down to single records. Only the records that still fail are dropped (and
+    counted), so one bad record neither wedges the writer nor takes the rest
+    of its batch with it. Handlers must write each batch atomically.
+    """
+
+    def __init__(self, handlers: Dict[str, Handler], max_size: int = WRITE_BEHIND_MAX_QUEUE,
+                 batch_size: int = WRITE_BEHIND_BATCH_SIZE,
+                 flush_interval: float = WRITE_BEHIND_FLUSH_INTERVAL,
+                 max_retries: int = WRITE_BEHIND_MAX_RETRIES,
+                 backoff: float = WRITE_BEHIND_BACKOFF,
+                 permanent_errors: Tuple[type, ...] = PERMANENT_ERRORS):
+        super().__init__("write-behind", max_size, batch_size, max_wait=flush_interval,
+                         idle_timeout=flush_interval,
+                         stat_names=("submitted", "written", "failed", "rejected", "retries", "splits"))
+        self.handlers = dict(handlers)
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.permanent_errors = tuple(permanent_errors)
+
+    def submit(self, kind: str, record: Dict, block: bool = True,
+               timeout: Optional[float] = None) -> bool:
+        """Queue a record; returns False if the writer is closed or the queue stays full."""
+        if kind not in self.handlers:
+            raise ValueError(f"No handler registered for {kind!r}")
+        if self._closed:
+            self._count("rejected")
+            return False
+        self._ensure_worker()
+        try:
+            self._queue.put((kind, record), block=block, timeout=timeout)
+        except queue.Full:
+            self._count("rejected")
+            return False
+        self._count("submitted")
+        return True
+
+    def submit_many(self, kind: str, records: List[Dict], block: bool = True,
+                    timeout: Optional[float] = None) -> int:
+        """Queue several records of one kind and return how many were accepted."""
+        return sum(self.submit(kind, record, block=block, timeout=timeout) for record in records)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far has been written; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Stop accepting records, write what is queued and stop the worker."""
+        self._closed = True
+        flushed = self.flush(timeout)
+        worker = self._worker
+        if worker is not None:
+            worker.join(timeout=self.flush_interval * 2)
+        return flushed
+
+    def _process(self, batch: List[Tuple[str, Dict]]):
+        grouped: Dict[str, List[Dict]] = defaultdict(list)
+        for kind, record in batch:
+            grouped[kind].append(record)
+        try:
+            for kind, records in grouped.items():
+                written = self._write_records(kind, records, self.max_retries)
+                self._count("written", written)
+                self._count("failed", len(records) - written)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_records(self, kind: str, records: List[Dict], max_retries: int) -> int:
+        """Write records, bisecting a failed batch to isolate bad records; returns how many were written."""
+        error = self._write_with_retry(kind, records, max_retries)
+        if error is None:
+            return len(records)
+        if len(records) == 1:
+            logging.error(f"Write-behind dropped a {kind} record: {error}")
+            return 0
+        self._count("splits")
+        middle = len(records) // 2
+        return (self._write_records(kind, records[:middle], 0)
+                + self._write_records(kind, records[middle:], 0))
+
+    def _write_with_retry(self, kind: str, records: List[Dict], max_retries: int) -> Optional[Exception]:
+        """Hand records to their handler; returns the last error, or None once written."""
+        for attempt in range(max_retries + 1):
+            try:
+                self.handlers[kind](records)
+                return None
+            except Exception as e:
+                if attempt == max_retries or isinstance(e, self.permanent_errors):
+                    return e
+                self._count("retries")
+                time.sleep(self.backoff * (2 ** attempt))
+        return None